@@ -1,15 +1,87 @@
-import pygame
+import argparse
+import os
 import sys
-import copy
+import functools
+import random
+from collections import Counter, namedtuple
+
+from goban_array import CODES, EMPTY, ArrayBoard
+from goban_tree import GameTree
+
+try:
+    import pygame
+except ImportError:  # the rules engine runs headless; only GobanGUI needs pygame
+    pygame = None
+
+NEIGHBOR_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+@functools.lru_cache(maxsize=None)
+def neighbor_table(size):
+    # Precomputed on-board neighbors of every point, shared by all boards of the same size
+    table = {}
+    for row in range(size):
+        for col in range(size):
+            table[(row, col)] = tuple((row + dr, col + dc) for dr, dc in NEIGHBOR_OFFSETS
+                                      if 0 <= row + dr < size and 0 <= col + dc < size)
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_table(size):
+    # Fixed seed so position hashes are stable across processes and runs
+    rng = random.Random(size)
+    return {color: {(row, col): rng.getrandbits(64) for row in range(size) for col in range(size)}
+            for color in ('B', 'W')}
+
+
+# One entry of the undo/redo stacks: only what the move changed, never a board copy.
+# ko_point is the ko point in force before the move was played.
+Move = namedtuple('Move', ['row', 'col', 'player', 'captured', 'ko_point'])
+
+
+class Chain:
+    # A connected group of same-colored stones, with its liberties kept up to date move by move
+    __slots__ = ('color', 'stones', 'liberties')
+
+    def __init__(self, color, stones, liberties):
+        self.color = color
+        self.stones = stones
+        self.liberties = liberties
+
 
 class Goban:
-    def __init__(self, size=19):
+    def __init__(self, size=19, superko=True, backend='list'):
         self.size = size
-        self.board = [[' ' for _ in range(size)] for _ in range(size)]
+        self.backend = backend  # 'list' of row lists, or 'array' for the flat ArrayBoard
+        self.board = self.make_board()
+        self.neighbors = neighbor_table(size)
+        self.zobrist = zobrist_table(size)
+        self.chains = {}  # (row, col) -> Chain holding the stone on that point
+        self.superko = superko
+        self.position_hash = 0  # 64-bit Zobrist hash of the stones on the board
+        self.seen_positions = Counter([self.position_hash])
         self.current_player = 'B'  # Black starts
         self.move_history = []
         self.redo_stack = []
         self.ko_point = None
+        self.setup_stones = []  # (row, col, color) placed outside the move history, e.g. handicap
+
+    def __getstate__(self):
+        # The lookup tables are shared per board size; rebuild them instead of copying them
+        state = self.__dict__.copy()
+        del state['neighbors'], state['zobrist']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.neighbors = neighbor_table(self.size)
+        self.zobrist = zobrist_table(self.size)
+
+    def make_board(self):
+        if self.backend == 'array':
+            return ArrayBoard(self.size)
+        return [[' ' for _ in range(self.size)] for _ in range(self.size)]
 
     def opponent(self):
         return 'W' if self.current_player == 'B' else 'B'
@@ -17,21 +89,32 @@ class Goban:
     def place_stone(self, row, col):
         if not self.is_valid_move(row, col):
             return False
-
-        self.move_history.append((row, col, self.current_player, copy.deepcopy(self.board))) # the current player at current board place the stone at (row, col)
-
-        self.board[row][col] = self.current_player
-        captured = self.remove_captured_stones(row, col)
-
-        if not captured and not self.has_liberties(row, col):
-            self.board[row][col] = ' '  # Undo the move if it's a suicide
-            self.move_history.pop() # history records nothing
+        if self.is_suicide(row, col):
+            return False
+        if self.superko and self.hash_after(row, col) in self.seen_positions:
             return False
 
+        self.play(row, col)
         self.redo_stack.clear()  # Clear redo stack on a new move
+        return True
+
+    def pass_move(self):
+        self.play(None, None)
+        self.redo_stack.clear()
+        return True
+
+    def play(self, row, col):
+        # Apply a move already known to be legal and record its delta; row None is a pass
+        player = self.current_player
+        captured = []
+        if row is not None:
+            self.add_stone(row, col, player)
+            captured = self.remove_captured_stones(row, col)
+        self.move_history.append(Move(row, col, player, tuple(captured), self.ko_point))
+        if row is not None:
+            self.seen_positions[self.position_hash] += 1
         self.current_player = self.opponent()
         self.update_ko_point(row, col, captured)
-        return True
 
     def is_valid_move(self, row, col):
         if not (0 <= row < self.size and 0 <= col < self.size):
@@ -42,84 +125,265 @@ class Goban:
             return False
         return True
 
-    def remove_captured_stones(self, row, col):
+    def is_suicide(self, row, col):
+        # Only the neighboring chains matter: an empty neighbor, a friendly chain with a spare
+        # liberty or an enemy chain in atari all give the new stone a liberty
+        if self.backend == 'array':
+            return self.is_suicide_flat(row, col)
+        for point in self.neighbors[(row, col)]:
+            r, c = point
+            if self.board[r][c] == ' ':
+                return False
+            liberties = len(self.chains[point].liberties)
+            if self.board[r][c] == self.current_player:
+                if liberties > 1:
+                    return False
+            elif liberties == 1:
+                return False
+        return True
+
+    def is_suicide_flat(self, row, col):
+        board = self.board
+        cells = board.cells
+        points = board.points
+        me = CODES[self.current_player]
+        for n in board.neighbor_indices[board.indices[(row, col)]]:
+            value = cells[n]
+            if value == EMPTY:
+                return False
+            liberties = len(self.chains[points[n]].liberties)
+            if value == me:
+                if liberties > 1:
+                    return False
+            elif liberties == 1:
+                return False
+        return True
+
+    def hash_after(self, row, col):
+        # Hash of the position the current player would reach by playing here, without playing
+        point = (row, col)
+        new_hash = self.position_hash ^ self.zobrist[self.current_player][point]
+        opponent = self.opponent()
         captured = []
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            r, c = row + dr, col + dc
-            if 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == self.opponent():
-                group = self.get_group(r, c)
-                if not self.has_liberties_group(group):
-                    captured.extend(group)
+        for n in self.neighbors[point]:
+            chain = self.chains.get(n)
+            if chain is not None and chain.color == opponent and chain.liberties == {point} and chain not in captured:
+                captured.append(chain)
+                for stone in chain.stones:
+                    new_hash ^= self.zobrist[opponent][stone]
+        return new_hash
+
+    def add_stone(self, row, col, color):
+        if self.backend == 'array':
+            return self.add_stone_flat(row, col, color)
+        point = (row, col)
+        self.board[row][col] = color
+        self.position_hash ^= self.zobrist[color][point]
+        chain = Chain(color, [point], set())
+        self.chains[point] = chain
+        for n in self.neighbors[point]:
+            r, c = n
+            if self.board[r][c] == ' ':
+                chain.liberties.add(n)
+            else:
+                other = self.chains[n]
+                other.liberties.discard(point)
+                if other.color == color and other is not chain:
+                    chain = self.merge_chains(chain, other)
+
+    def add_stone_flat(self, row, col, color):
+        # add_stone on the ArrayBoard's cells and flat neighbor table, skipping the row views
+        board = self.board
+        cells = board.cells
+        points = board.points
+        point = (row, col)
+        i = board.indices[point]
+        cells[i] = CODES[color]
+        self.position_hash ^= self.zobrist[color][point]
+        chain = Chain(color, [point], set())
+        self.chains[point] = chain
+        for n in board.neighbor_indices[i]:
+            if cells[n] == EMPTY:
+                chain.liberties.add(points[n])
+            else:
+                other = self.chains[points[n]]
+                other.liberties.discard(point)
+                if other.color == color and other is not chain:
+                    chain = self.merge_chains(chain, other)
+
+    def merge_chains(self, a, b):
+        # Relabel the smaller chain so each stone moves O(log n) times over a game
+        if len(a.stones) < len(b.stones):
+            a, b = b, a
+        for stone in b.stones:
+            self.chains[stone] = a
+        a.stones.extend(b.stones)
+        a.liberties |= b.liberties
+        return a
+
+    def remove_chain(self, chain):
+        keys = self.zobrist[chain.color]
+        if self.backend == 'array':
+            cells = self.board.cells
+            indices = self.board.indices
+            for point in chain.stones:
+                cells[indices[point]] = EMPTY
+                self.position_hash ^= keys[point]
+                del self.chains[point]
+        else:
+            for r, c in chain.stones:
+                self.board[r][c] = ' '
+                self.position_hash ^= keys[(r, c)]
+                del self.chains[(r, c)]
+        for point in chain.stones:
+            for n in self.neighbors[point]:
+                other = self.chains.get(n)
+                if other is not None:
+                    other.liberties.add(point)
+
+    def build_chain(self, row, col):
+        color = self.board[row][col]
+        stones = self.get_group(row, col)
+        liberties = set()
+        for point in stones:
+            for r, c in self.neighbors[point]:
+                if self.board[r][c] == ' ':
+                    liberties.add((r, c))
+        chain = Chain(color, list(stones), liberties)
+        for point in stones:
+            self.chains[point] = chain
+        return chain
+
+    def rebuild_chains(self):
+        self.chains = {}
+        for row in range(self.size):
+            for col in range(self.size):
+                if self.board[row][col] != ' ' and (row, col) not in self.chains:
+                    self.build_chain(row, col)
 
-        for r, c in captured:
-            self.board[r][c] = ' '
+    def remove_captured_stones(self, row, col):
+        captured = []
+        for point in self.neighbors[(row, col)]:
+            chain = self.chains.get(point)
+            if chain is not None and chain.color == self.opponent() and not chain.liberties:
+                captured.extend(chain.stones)
+                self.remove_chain(chain)
 
         return captured
 
     def get_group(self, row, col):
+        chain = self.chains.get((row, col))
+        if chain is not None and chain.color == self.board[row][col]:
+            return set(chain.stones)
+
         color = self.board[row][col]
         group = set([(row, col)])
         frontier = [(row, col)]
 
         while frontier:
             r, c = frontier.pop()
-            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < self.size and 0 <= nc < self.size and self.board[nr][nc] == color and (nr, nc) not in group:
+            for nr, nc in self.neighbors[(r, c)]:
+                if self.board[nr][nc] == color and (nr, nc) not in group:
                     group.add((nr, nc))
                     frontier.append((nr, nc))
 
         return group
 
     def has_liberties_group(self, group):
-        for row, col in group:
-            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                r, c = row + dr, col + dc
-                if 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == ' ':
+        for point in group:
+            for r, c in self.neighbors[point]:
+                if self.board[r][c] == ' ':
                     return True
         return False
 
     def has_liberties(self, row, col):
+        chain = self.chains.get((row, col))
+        if chain is not None:
+            return bool(chain.liberties)
         return self.has_liberties_group(self.get_group(row, col))
 
     def update_ko_point(self, row, col, captured):
-        if len(captured) == 1 and len(self.get_group(row, col)) == 1:
+        if len(captured) == 1 and len(self.chains[(row, col)].stones) == 1:
             self.ko_point = captured[0]
         else:
             self.ko_point = None
 
+    def take_back(self, move):
+        # Revert the cells touched by move; only the chains around them are rebuilt
+        point = (move.row, move.col)
+        opponent = 'W' if move.player == 'B' else 'B'
+        split = self.chains[point].stones
+        for stone in split:
+            del self.chains[stone]
+        self.board[move.row][move.col] = ' '
+        self.position_hash ^= self.zobrist[move.player][point]
+        for r, c in move.captured:
+            self.board[r][c] = opponent
+            self.position_hash ^= self.zobrist[opponent][(r, c)]
+
+        for stone in split + list(move.captured):
+            if stone != point and stone not in self.chains:
+                self.build_chain(*stone)
+        for stone in move.captured:
+            for n in self.neighbors[stone]:
+                chain = self.chains.get(n)
+                if chain is not None and chain.color == move.player:
+                    chain.liberties.discard(stone)
+        for n in self.neighbors[point]:
+            chain = self.chains.get(n)
+            if chain is not None:
+                chain.liberties.add(point)
+
     def undo_move(self):
         if self.move_history:
-            last_move = self.move_history.pop()
-            row, col, player, board_state = last_move
-            self.redo_stack.append((row, col, self.current_player, copy.deepcopy(self.board)))
-            self.board = board_state
-            self.current_player = player
-            self.ko_point = None
+            move = self.move_history.pop()
+            if move.row is not None:
+                self.seen_positions[self.position_hash] -= 1
+                if not self.seen_positions[self.position_hash]:
+                    del self.seen_positions[self.position_hash]
+                self.take_back(move)
+            self.redo_stack.append(move)
+            self.current_player = move.player
+            self.ko_point = move.ko_point
             return True
         return False
 
     def redo_move(self):
         if self.redo_stack:
             move = self.redo_stack.pop()
-            row, col, player, board_state = move
-            self.move_history.append((row, col, self.current_player, copy.deepcopy(self.board)))
-            self.board = board_state
-            self.current_player = player
+            self.current_player = move.player
+            self.ko_point = move.ko_point
+            self.play(move.row, move.col)
             return True
         return False
 
+    def place_setup_stones(self, stones):
+        for row, col, color in stones:
+            self.add_stone(row, col, color)
+        self.setup_stones.extend(stones)
+        self.seen_positions = Counter([self.position_hash])
+
+    def is_over(self):
+        # Two passes in a row end the game
+        return (len(self.move_history) >= 2 and self.move_history[-1].row is None
+                and self.move_history[-2].row is None)
+
     def new_game(self):
-        self.board = [[' ' for _ in range(self.size)] for _ in range(self.size)]
+        self.board = self.make_board()
+        self.chains = {}
+        self.position_hash = 0
+        self.seen_positions = Counter([self.position_hash])
         self.current_player = 'B'
         self.move_history.clear()
         self.redo_stack.clear()
         self.ko_point = None
+        self.setup_stones = []
 
 
 class GobanGUI:
     def __init__(self, goban):
         self.goban = goban
+        self.tree = GameTree(goban)  # Undo keeps the line it took back as a variation
         self.cell_size = 30
         self.margin = 20
         self.board_size = (goban.size - 1) * self.cell_size + 2 * self.margin
@@ -139,70 +403,169 @@ class GobanGUI:
         self.button_hover_color = (150, 150, 255)
 
         self.font = pygame.font.Font(None, 24)
-
-    def draw_board(self):
-        self.screen.fill((255, 255, 255))
-        pygame.draw.rect(self.screen, self.board_color, (0, 0, self.board_size, self.board_size))
+        self.status = ''
+        self.score_text = ''
+        self.scored_hash = None
+        self.idle_timeout = 500  # ms an event-driven loop sleeps before re-checking hover state
+        self.frame_time = 16  # ms between polls while waiting on the engine
+
+        self.undo_button = pygame.Rect(self.board_size + 10, 10, 80, 30)
+        self.new_game_button = pygame.Rect(self.board_size + 10, 50, 80, 30)
+        self.redo_button = pygame.Rect(self.board_size + 10, 90, 80, 30)
+        self.buttons = [(self.undo_button, "Undo"), (self.new_game_button, "New"), (self.redo_button, "Redo")]
+        self.ui_rects = [pygame.Rect(self.board_size, 0, self.window_width - self.board_size, self.window_height),
+                         pygame.Rect(0, self.board_size, self.board_size, self.window_height - self.board_size)]
+
+        # Everything static is drawn once; frames only blit these
+        self.background = self.render_background()
+        self.stone_sprites = {'B': self.render_stone(self.black_stone_color),
+                              'W': self.render_stone(self.white_stone_color)}
+        self.labels = {label: self.font.render(label, True, self.text_color) for _, label in self.buttons}
+        self.status_surface = (None, None)
+        self.journal = None  # goban_journal.Journal that gets every change before it is drawn
+
+        # What the display currently shows; None forces a full redraw on the next render()
+        self.drawn_stones = None
+        self.drawn_hash = None
+        self.drawn_ui = None
+
+    def render_background(self):
+        surface = pygame.Surface((self.window_width, self.window_height))
+        surface.fill((255, 255, 255))
+        pygame.draw.rect(surface, self.board_color, (0, 0, self.board_size, self.board_size))
         for i in range(self.goban.size):
-            pygame.draw.line(self.screen, self.line_color,
+            pygame.draw.line(surface, self.line_color,
                              (self.margin + i * self.cell_size, self.margin),
                              (self.margin + i * self.cell_size, self.board_size - self.margin))
-            pygame.draw.line(self.screen, self.line_color,
+            pygame.draw.line(surface, self.line_color,
                              (self.margin, self.margin + i * self.cell_size),
                              (self.board_size - self.margin, self.margin + i * self.cell_size))
+        self.draw_star_points(surface)
+        return surface
 
-        self.draw_star_points()
+    def render_stone(self, color):
+        radius = self.cell_size // 2 - 2
+        sprite = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (self.cell_size // 2, self.cell_size // 2), radius)
+        return sprite
 
-    def draw_star_points(self):
-        star_points = [(3, 3), (3, 9), (3, 15), (9, 3), (9, 9), (9, 15), (15, 3), (15, 9), (15, 15)]
-        for row, col in star_points:
-            pygame.draw.circle(self.screen, self.line_color,
-                               (self.margin + col * self.cell_size, self.margin + row * self.cell_size),
-                               4)
+    def draw_board(self):
+        self.screen.blit(self.background, (0, 0))
+
+    def draw_star_points(self, surface):
+        size = self.goban.size
+        edge = 3 if size >= 13 else 2
+        lines = [edge, size // 2, size - 1 - edge] if size % 2 else [edge, size - 1 - edge]
+        if size < 7:
+            lines = []
+        for row in lines:
+            for col in lines:
+                pygame.draw.circle(surface, self.line_color,
+                                   (self.margin + col * self.cell_size, self.margin + row * self.cell_size),
+                                   4)
+
+    def cell_rect(self, row, col):
+        return pygame.Rect(self.margin + col * self.cell_size - self.cell_size // 2,
+                           self.margin + row * self.cell_size - self.cell_size // 2,
+                           self.cell_size, self.cell_size)
+
+    def draw_point(self, row, col):
+        rect = self.cell_rect(row, col)
+        self.screen.blit(self.background, rect, rect)
+        color = self.goban.board[row][col]
+        if color != ' ':
+            self.screen.blit(self.stone_sprites[color], rect)
+        return rect
 
     def draw_stones(self):
         for row in range(self.goban.size):
             for col in range(self.goban.size):
                 if self.goban.board[row][col] != ' ':
-                    color = self.black_stone_color if self.goban.board[row][col] == 'B' else self.white_stone_color
-                    pos = (self.margin + col * self.cell_size, self.margin + row * self.cell_size)
-                    pygame.draw.circle(self.screen, color, pos, self.cell_size // 2 - 2)
+                    self.screen.blit(self.stone_sprites[self.goban.board[row][col]], self.cell_rect(row, col))
+
+    def hovered_button(self):
+        mouse_pos = pygame.mouse.get_pos()
+        for i, (button, _) in enumerate(self.buttons):
+            if button.collidepoint(mouse_pos):
+                return i
+        return None
 
     def draw_ui(self):
+        for rect in self.ui_rects:
+            self.screen.blit(self.background, rect, rect)
+
         current_player_color = self.black_stone_color if self.goban.current_player == 'B' else self.white_stone_color
         pos = (self.board_size // 2, self.window_height - 20)
         pygame.draw.circle(self.screen, current_player_color, pos, 10)
         if current_player_color == self.white_stone_color:
             pygame.draw.circle(self.screen, self.black_stone_color, pos, 10, 1)  # Outline
 
-        undo_button = pygame.Rect(self.board_size + 10, 10, 80, 30)
-        new_game_button = pygame.Rect(self.board_size + 10, 50, 80, 30)
-        redo_button = pygame.Rect(self.board_size + 10, 90, 80, 30)
+        hovered = self.hovered_button()
+        for i, (button, label) in enumerate(self.buttons):
+            pygame.draw.rect(self.screen, self.button_hover_color if i == hovered else self.button_color, button)
+            pygame.draw.rect(self.screen, self.text_color, button, 2)
+            text_surface = self.labels[label]
+            self.screen.blit(text_surface, text_surface.get_rect(center=button.center))
+
+        if self.score_text:
+            self.screen.blit(self.font.render(self.score_text, True, self.text_color), (10, self.window_height - 28))
+
+        if self.status:
+            if self.status_surface[0] != self.status:
+                self.status_surface = (self.status, self.font.render(self.status, True, self.text_color))
+            self.screen.blit(self.status_surface[1], (self.board_size // 2 + 20, self.window_height - 28))
+
+        return self.undo_button, self.new_game_button, self.redo_button
+
+    def update_score(self):
+        # Tromp-Taylor area score of the current position, recomputed once per new position
+        from goban_score import tromp_taylor
+        black, white, score = tromp_taylor(self.goban)
+        self.score_text = f'Area B+{score:.1f}' if score > 0 else f'Area W+{-score:.1f}'
+        self.scored_hash = self.goban.position_hash
+
+    def invalidate(self):
+        self.drawn_stones = None
+
+    def render(self):
+        # Redraw and push only the cells and UI regions that changed since the last frame
+        if self.goban.position_hash != self.scored_hash:
+            self.update_score()
+        if self.drawn_stones is None:
+            self.draw_board()
+            self.draw_stones()
+            self.draw_ui()
+            self.drawn_stones = [list(row) for row in self.goban.board]
+            self.drawn_hash = self.goban.position_hash
+            self.drawn_ui = (self.goban.current_player, self.hovered_button(), self.status, self.score_text)
+            pygame.display.flip()
+            return
+
+        rects = []
+        if self.goban.position_hash != self.drawn_hash:
+            for row in range(self.goban.size):
+                drawn = self.drawn_stones[row]
+                for col, color in enumerate(self.goban.board[row]):
+                    if drawn[col] != color:
+                        drawn[col] = color
+                        rects.append(self.draw_point(row, col))
+            self.drawn_hash = self.goban.position_hash
+
+        ui_state = (self.goban.current_player, self.hovered_button(), self.status, self.score_text)
+        if ui_state != self.drawn_ui:
+            self.draw_ui()
+            self.drawn_ui = ui_state
+            rects.extend(self.ui_rects)
 
-        mouse_pos = pygame.mouse.get_pos()
-        button_color_undo = self.button_hover_color if undo_button.collidepoint(mouse_pos) else self.button_color
-        button_color_new_game = self.button_hover_color if new_game_button.collidepoint(mouse_pos) else self.button_color
-        button_color_redo = self.button_hover_color if redo_button.collidepoint(mouse_pos) else self.button_color
-
-        pygame.draw.rect(self.screen, button_color_undo, undo_button)
-        pygame.draw.rect(self.screen, self.text_color, undo_button, 2)
-        text_surface = self.font.render("Undo", True, self.text_color)
-        text_rect = text_surface.get_rect(center=undo_button.center)
-        self.screen.blit(text_surface, text_rect)
-
-        pygame.draw.rect(self.screen, button_color_new_game, new_game_button)
-        pygame.draw.rect(self.screen, self.text_color, new_game_button, 2)
-        text_surface = self.font.render("New", True, self.text_color)
-        text_rect = text_surface.get_rect(center=new_game_button.center)
-        self.screen.blit(text_surface, text_rect)
-
-        pygame.draw.rect(self.screen, button_color_redo, redo_button)
-        pygame.draw.rect(self.screen, self.text_color, redo_button, 2)
-        text_surface = self.font.render("Redo", True, self.text_color)
-        text_rect = text_surface.get_rect(center=redo_button.center)
-        self.screen.blit(text_surface, text_rect)
-
-        return undo_button, new_game_button, redo_button
+        if rects:
+            pygame.display.update(rects)
+
+    def wait_events(self, timeout):
+        # Sleep in SDL until an event arrives or timeout ms pass, then drain the queue
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
 
     def get_board_pos(self, mouse_pos):
         x, y = mouse_pos
@@ -210,36 +573,196 @@ class GobanGUI:
         col = round((x - self.margin) / self.cell_size)
         return row, col
 
-    def run_human_vs_human(self):
+    def navigate(self, key):
+        # Arrow keys walk the variation tree: left/right along the line, up/down across branches
+        if key == pygame.K_LEFT:
+            self.tree.back()
+        elif key == pygame.K_RIGHT:
+            self.tree.forward()
+        elif key == pygame.K_UP:
+            self.tree.switch_branch(-1)
+        elif key == pygame.K_DOWN:
+            self.tree.switch_branch(1)
+
+    def run_human_vs_human(self, event_driven=False):
+        # event_driven blocks between events instead of ticking at 60 fps, so an idle
+        # board costs no CPU; render() only redraws after a state change either way
         clock = pygame.time.Clock()
         while True:
-            for event in pygame.event.get():
+            events = self.wait_events(self.idle_timeout) if event_driven else pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit(1)
+                elif event.type == pygame.WINDOWEXPOSED:
+                    self.invalidate()
+                elif event.type == pygame.KEYDOWN:
+                    self.navigate(event.key)
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left click
-                        undo_button, new_game_button, redo_button = self.draw_ui()
-                        if undo_button.collidepoint(event.pos):
-                            self.goban.undo_move()
-                        elif new_game_button.collidepoint(event.pos):
-                            self.goban.new_game()
-                        elif redo_button.collidepoint(event.pos):
-                            self.goban.redo_move()
+                        if self.undo_button.collidepoint(event.pos):
+                            self.tree.back()
+                        elif self.new_game_button.collidepoint(event.pos):
+                            self.tree.reset()
+                        elif self.redo_button.collidepoint(event.pos):
+                            self.tree.forward()
                         else:
                             row, col = self.get_board_pos(event.pos)
-                            self.goban.place_stone(row, col)
+                            self.tree.play(row, col)
+
+            index, count = self.tree.variations()
+            self.status = f'variation {index + 1}/{count}' if count > 1 else ''
+            if self.journal is not None:
+                self.journal.sync(self.goban)
+            self.render()
+            if not event_driven:
+                clock.tick(60)
+
+    def run_human_vs_ai(self, engine, ai_player='W', event_driven=False):
+        # The engine searches in its own process and is only polled here, so input and
+        # drawing keep their 60 fps while it thinks or ponders on the human's time.
+        # event_driven sleeps on the event queue, waking every frame only while the engine thinks.
+        clock = pygame.time.Clock()
+        while True:
+            if event_driven:
+                events = self.wait_events(self.frame_time if engine.thinking else self.idle_timeout)
+            else:
+                events = pygame.event.get()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit(1)
+                elif event.type == pygame.WINDOWEXPOSED:
+                    self.invalidate()
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 1:  # Left click
+                        if self.undo_button.collidepoint(event.pos):
+                            self.tree.back()
+                            if self.goban.current_player == ai_player:
+                                self.tree.back()  # take back the engine's reply as well
+                            engine.ponder(self.goban)
+                        elif self.new_game_button.collidepoint(event.pos):
+                            self.tree.reset()
+                            engine.ponder(self.goban)
+                        elif self.redo_button.collidepoint(event.pos):
+                            self.tree.forward()
+                            if self.goban.current_player == ai_player:
+                                self.tree.forward()
+                            engine.ponder(self.goban)
+                        elif self.goban.current_player != ai_player:
+                            row, col = self.get_board_pos(event.pos)
+                            self.tree.play(row, col)
+
+            if self.goban.current_player == ai_player and not self.goban.is_over():
+                if not engine.thinking:
+                    engine.request_move(self.goban)
+                done, move = engine.poll()
+                if done:
+                    if move is None:
+                        self.tree.pass_move()
+                    else:
+                        self.tree.play(*move)
+            if engine.thinking:
+                self.status = 'thinking...'
+            elif engine.last_stats.get('book'):
+                self.status = 'book move'
+            elif engine.last_stats:
+                self.status = f"{engine.last_stats['playouts_per_sec']:.0f} playouts/s"
+
+            if self.journal is not None:
+                self.journal.sync(self.goban)
+            self.render()
+            if not event_driven:
+                clock.tick(60)
+
+    def run_client(self, client, event_driven=False):
+        # Network game: clicks become requests to the server, and the board only changes
+        # when the server's deltas are applied by client.poll()
+        clock = pygame.time.Clock()
+        while True:
+            events = self.wait_events(self.frame_time) if event_driven else pygame.event.get()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit(1)
+                elif event.type == pygame.WINDOWEXPOSED:
+                    self.invalidate()
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 1:  # Left click
+                        if self.undo_button.collidepoint(event.pos):
+                            client.undo()
+                        elif self.new_game_button.collidepoint(event.pos):
+                            client.create(self.goban.size, client.colors)
+                        elif self.redo_button.collidepoint(event.pos):
+                            pass  # the server keeps no redo line
+                        elif self.goban.current_player in client.colors:
+                            row, col = self.get_board_pos(event.pos)
+                            client.play(row, col)
 
-            self.draw_board()
-            self.draw_stones()
-            self.draw_ui()
-            pygame.display.flip()
-            clock.tick(60)
+            if client.poll() or not self.status:
+                self.status = f"game {client.game} ({'+'.join(client.colors) or 'watching'})"
+            if client.errors:
+                self.status = client.errors[-1]
+                client.errors.clear()
+            self.render()
+            if not event_driven:
+                clock.tick(60)
 
 def main():
-    goban = Goban()
+    parser = argparse.ArgumentParser(description='Goban')
+    parser.add_argument('--ai', choices=['B', 'W'], help='let the MCTS engine play this color')
+    parser.add_argument('--seconds', type=float, default=2.0, help='engine thinking time per move')
+    parser.add_argument('--workers', type=int, default=1, help='engine processes, 0 for every core')
+    parser.add_argument('--book', help='opening book file for the engine')
+    parser.add_argument('--sgf', help='start from the main line of this SGF file')
+    parser.add_argument('--connect', metavar='HOST:PORT', help='play on a goban_server.py server')
+    parser.add_argument('--game', type=int, help='with --connect: join this game instead of creating one')
+    parser.add_argument('--size', type=int, default=19, help='with --connect: size of a created game')
+    parser.add_argument('--seats', help='with --connect: colors to play, e.g. B, W, BW; empty to watch')
+    parser.add_argument('--journal', default=os.path.join(os.path.expanduser('~'), '.goban-journal'),
+                        help='record the game here and resume it on the next start')
+    parser.add_argument('--no-journal', action='store_true', help='keep the game in memory only')
+    parser.add_argument('--poll', action='store_true', help='run the window loop at a fixed 60 fps instead of waiting for events')
+    args = parser.parse_args()
+
+    if args.connect:
+        from goban_server import GameClient
+        host, _, port = args.connect.rpartition(':')
+        client = GameClient(host or '127.0.0.1', int(port))
+        colors = None if args.seats is None else list(args.seats.upper())  # default: the first free seat
+        goban = client.join(args.game, colors) if args.game else client.create(args.size, colors)
+        try:
+            GobanGUI(goban).run_client(client, event_driven=not args.poll)
+        finally:
+            client.close()
+        return
+
+    goban = None
+    if args.sgf:
+        from goban_sgf import load
+        goban = load(args.sgf)
+    elif not args.no_journal:
+        from goban_journal import resume
+        goban = resume(args.journal)  # pick up where the last session stopped
+    if goban is None:
+        goban = Goban()
     gui = GobanGUI(goban)
-    gui.run_human_vs_human()
+    if not args.no_journal:
+        from goban_journal import Journal
+        gui.journal = Journal(args.journal, goban)
+    try:
+        if args.ai:
+            from goban_engine import AsyncEngine
+            engine = AsyncEngine(args.seconds, workers=args.workers, book=args.book)
+            try:
+                gui.run_human_vs_ai(engine, args.ai, event_driven=not args.poll)
+            finally:
+                engine.close()
+        else:
+            gui.run_human_vs_human(event_driven=not args.poll)
+    finally:
+        if gui.journal is not None:
+            gui.journal.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+import functools
+from array import array
+
+EMPTY, BLACK, WHITE, BORDER = 0, 1, 2, 3
+CODES = {' ': EMPTY, 'B': BLACK, 'W': WHITE}
+CHARS = (' ', 'B', 'W')
+
+
+class BoardRow:
+    # View of one board row, so code written for board[row][col] works unchanged
+    __slots__ = ('cells', 'start', 'size')
+
+    def __init__(self, cells, start, size):
+        self.cells = cells
+        self.start = start
+        self.size = size
+
+    def __getitem__(self, col):
+        if not 0 <= col < self.size:
+            raise IndexError(col)
+        return CHARS[self.cells[self.start + col]]
+
+    def __setitem__(self, col, value):
+        if not 0 <= col < self.size:
+            raise IndexError(col)
+        self.cells[self.start + col] = CODES[value]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for col in range(self.size):
+            yield CHARS[self.cells[self.start + col]]
+
+
+@functools.lru_cache(maxsize=None)
+def flat_tables(size):
+    # Shared by all boards of the same size: the on-board neighbor indices of every flat
+    # index, the (row, col) of every index (None on the border) and the index of every point
+    stride = size + 2
+    indices = {(row, col): (row + 1) * stride + col + 1 for row in range(size) for col in range(size)}
+    points = [None] * (stride * stride)
+    for point, i in indices.items():
+        points[i] = point
+    neighbors = tuple(tuple(i + o for o in (-stride, stride, -1, 1) if points[i + o] is not None)
+                      if points[i] is not None else () for i in range(len(points)))
+    return neighbors, tuple(points), indices
+
+
+class ArrayBoard:
+    # The position as one flat int8 array with a sentinel border around the playing area.
+    # Point (row, col) lives at index (row + 1) * stride + col + 1, so neighbors are fixed
+    # offsets and never need a bounds check. Row views are made on demand, so cells is the
+    # only per-board data.
+    __slots__ = ('size', 'stride', 'cells', 'neighbor_indices', 'points', 'indices')
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 2
+        self.cells = array('b', [BORDER]) * (self.stride * self.stride)
+        for row in range(size):
+            start = self.index(row, 0)
+            self.cells[start:start + size] = array('b', [EMPTY]) * size
+        self.attach()
+
+    def attach(self):
+        self.neighbor_indices, self.points, self.indices = flat_tables(self.size)  # shared per size
+
+    def __getstate__(self):
+        return self.size, self.cells
+
+    def __setstate__(self, state):
+        self.size, self.cells = state
+        self.stride = self.size + 2
+        self.attach()
+
+    def index(self, row, col):
+        return (row + 1) * self.stride + col + 1
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        return BoardRow(self.cells, self.index(row, 0), self.size)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for row in range(self.size):
+            yield BoardRow(self.cells, self.index(row, 0), self.size)
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from goban import Goban
+from goban_playout import Playout, play_game
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'goban_bench_baseline.json')
+TOLERANCE = 0.15  # slowdown beyond which a metric counts as a regression
+
+
+def best_time(function, repeat):
+    # Minimum over repeats: the least disturbed run
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def dense_game(size, seed=0):
+    # Moves of a random game played until the board is full, so later moves land on a dense board
+    goban = Goban(size)
+    Playout(goban, random.Random(seed)).run('random')
+    return [(move.row, move.col) for move in goban.move_history]
+
+
+def replay(size, moves):
+    goban = Goban(size)
+    for move in moves:
+        if move[0] is None:
+            goban.pass_move()
+        else:
+            goban.place_stone(*move)
+    return goban
+
+
+def bench_place_stone(repeat):
+    moves = dense_game(19)
+    seconds = best_time(lambda: replay(19, moves), repeat)
+    return {'place_stone_19': (len(moves) / seconds, 'moves/s', True)}
+
+
+def bench_large_capture(repeat):
+    # Black fills the last liberty of a white group covering the rest of the 19x19 board
+    goban = Goban(19)
+    goban.place_setup_stones([(r, c, 'W') for r in range(19) for c in range(19) if (r, c) != (0, 0)])
+    capture = []
+    undo = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        goban.place_stone(0, 0)
+        middle = time.perf_counter()
+        goban.undo_move()
+        end = time.perf_counter()
+        capture.append(middle - start)
+        undo.append(end - middle)
+    return {'capture_360_stones': (min(capture) * 1e3, 'ms', False),
+            'undo_capture_360_stones': (min(undo) * 1e3, 'ms', False)}
+
+
+def bench_undo_redo(repeat):
+    moves = dense_game(19, seed=1)
+    goban = replay(19, moves)
+    count = len(goban.move_history)
+
+    def undo_all():
+        while goban.undo_move():
+            pass
+
+    def redo_all():
+        while goban.redo_move():
+            pass
+
+    undo = redo = None
+    for _ in range(repeat):
+        seconds = best_time(undo_all, 1)
+        undo = seconds if undo is None else min(undo, seconds)
+        seconds = best_time(redo_all, 1)
+        redo = seconds if redo is None else min(redo, seconds)
+    return {'undo_move': (undo / count * 1e6, 'us', False),
+            'redo_move': (redo / count * 1e6, 'us', False)}
+
+
+def bench_history_memory(repeat):
+    # Bytes the engine keeps per move played, and nothing else: the move_history slot, the
+    # Move delta with its captured points, and the move's share of the superko records
+    moves = dense_game(19, seed=2)
+    goban = replay(19, moves)
+    history = goban.move_history
+    size = sys.getsizeof(history)
+    for move in history:
+        size += sys.getsizeof(move)
+        if move.captured:
+            size += sys.getsizeof(move.captured) + sum(sys.getsizeof(point) for point in move.captured)
+    size += sys.getsizeof(goban.seen_positions) + sum(sys.getsizeof(key) for key in goban.seen_positions)
+    return {'bytes_per_history_entry': (size / len(history), 'bytes', False)}
+
+
+def bench_playouts(repeat, games=None):
+    games = games or {9: 40, 13: 15, 19: 6}
+    results = {}
+    for size, count in games.items():
+        seconds = best_time(lambda: [play_game(size, 'random', seed) for seed in range(count)], repeat)
+        results[f'playouts_{size}x{size}'] = (count / seconds, 'games/s', True)
+    return results
+
+
+BENCHMARKS = [bench_place_stone, bench_large_capture, bench_undo_redo, bench_history_memory, bench_playouts]
+
+
+def run(repeat=5):
+    metrics = {}
+    for benchmark in BENCHMARKS:
+        for name, (value, unit, higher_is_better) in benchmark(repeat).items():
+            metrics[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+    return {'python': sys.version.split()[0], 'platform': platform.platform(), 'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'metrics': metrics}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    # [(name, value, baseline value, change, regressed)], change > 0 meaning better
+    rows = []
+    for name, metric in results['metrics'].items():
+        old = baseline.get('metrics', {}).get(name)
+        if old is None or not old['value']:
+            rows.append((name, metric['value'], None, None, False))
+            continue
+        ratio = metric['value'] / old['value']
+        change = ratio - 1 if metric['higher_is_better'] else 1 / ratio - 1 if ratio else 0.0
+        rows.append((name, metric['value'], old['value'], change, change < -tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Goban engine benchmarks')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write the results as JSON here')
+    parser.add_argument('--baseline', default=BASELINE, help='JSON results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = 0
+    for name, value, old, change, regressed in compare(results, baseline, args.tolerance):
+        unit = results['metrics'][name]['unit']
+        line = f'{name:>26}: {value:12.2f} {unit:8s}'
+        if old is not None:
+            line += f' baseline {old:12.2f}  {change:+7.1%}' + ('  REGRESSION' if regressed else '')
+        regressions += regressed
+        print(line)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1)
+        print(f'baseline saved to {args.baseline}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
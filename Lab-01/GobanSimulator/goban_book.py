@@ -0,0 +1,146 @@
+import argparse
+import collections
+import itertools
+import multiprocessing
+import struct
+
+import numpy as np
+
+from goban_sgf import iter_collection_texts, parse_game, read_games, replay_steps, start_position
+from goban_symmetry import INVERSE, SymmetricHasher, canonical, transform
+
+# File layout: a 16-byte header (magic, board size, record count) followed by three column
+# arrays sorted by key: uint64 canonical position hashes, uint32 play counts and uint16
+# moves in the canonical orientation (row * size + col). Records for one position are
+# adjacent, most played first.
+MAGIC = b'GOBOOK1\0'
+HEADER = struct.Struct('<8sII')
+
+
+class OpeningBook:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, self.size, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an opening book')
+        offset = HEADER.size
+        self.keys = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(count,)) if count else np.zeros(0, '<u8')
+        offset += 8 * count
+        self.counts = np.memmap(path, dtype='<u4', mode='r', offset=offset, shape=(count,)) if count else np.zeros(0, '<u4')
+        offset += 4 * count
+        self.moves = np.memmap(path, dtype='<u2', mode='r', offset=offset, shape=(count,)) if count else np.zeros(0, '<u2')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, goban):
+        # [((row, col), count), ...] played from this position in any orientation, most played first
+        if goban.size != self.size:
+            return []
+        key, symmetry = canonical(goban)
+        key = np.uint64(key)
+        lo = np.searchsorted(self.keys, key, 'left')
+        hi = np.searchsorted(self.keys, key, 'right')
+        inverse = INVERSE[symmetry]
+        return [(transform(divmod(int(move), self.size), self.size, inverse), int(count))
+                for move, count in zip(self.moves[lo:hi], self.counts[lo:hi])]
+
+    def best_move(self, goban):
+        for point, _ in self.lookup(goban):
+            if goban.is_valid_move(*point) and not goban.is_suicide(*point):
+                return point
+        return None
+
+
+def count_openings(task):
+    # Counts (canonical position, canonical move) pairs over the first depth moves of each game
+    texts, size, depth = task
+    counts = collections.Counter()
+    for text in texts:
+        try:
+            game = parse_game(text)
+            if game.size != size:
+                continue
+            goban = start_position(game)
+            hasher = SymmetricHasher(goban)
+            moves = game.moves()
+            for (color, point), number in zip(moves, replay_steps(goban, game)):
+                if number > depth:
+                    break
+                if point is not None:
+                    symmetry = min(range(8), key=hasher.hashes.__getitem__)
+                    row, col = transform(point, size, symmetry)
+                    counts[(hasher.hashes[symmetry], row * size + col)] += 1
+                hasher.update(goban.move_history[-1])
+        except (ValueError, IndexError):
+            continue
+    return counts
+
+
+def write_book(path, size, counts, min_count=1):
+    records = sorted(((key, -count, move) for (key, move), count in counts.items() if count >= min_count))
+    keys = np.array([r[0] for r in records], dtype='<u8')
+    plays = np.array([-r[1] for r in records], dtype='<u4')
+    moves = np.array([r[2] for r in records], dtype='<u2')
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, size, len(records)))
+        f.write(keys.tobytes())
+        f.write(plays.tobytes())
+        f.write(moves.tobytes())
+    return len(records)
+
+
+def build_book(paths, path, size=19, depth=30, min_count=2, workers=None, batch_size=1000):
+    workers = workers or multiprocessing.cpu_count()
+    texts = iter_collection_texts(paths)
+    tasks = ((batch, size, depth) for batch in iter(lambda: list(itertools.islice(texts, batch_size)), []))
+    counts = collections.Counter()
+    if workers == 1:
+        for task in tasks:
+            counts.update(count_openings(task))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            pending = collections.deque()
+            for task in tasks:
+                pending.append(pool.apply_async(count_openings, (task,)))
+                if len(pending) >= workers * 2:
+                    counts.update(pending.popleft().get())
+            while pending:
+                counts.update(pending.popleft().get())
+    return write_book(path, size, counts, min_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Opening book for Goban')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='build a book from SGF files')
+    build.add_argument('book')
+    build.add_argument('paths', nargs='+')
+    build.add_argument('--size', type=int, default=19)
+    build.add_argument('--depth', type=int, default=30, help='moves of each game to include')
+    build.add_argument('--min-count', type=int, default=2, help='drop moves played fewer times')
+    build.add_argument('--workers', type=int, default=0, help='processes to use, 0 for every core')
+    show = commands.add_parser('show', help='list book moves for the position of an SGF game')
+    show.add_argument('book')
+    show.add_argument('sgf')
+    show.add_argument('--move', type=int, default=0, help='position after this many moves')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        records = build_book(args.paths, args.book, args.size, args.depth, args.min_count, args.workers)
+        print(f'{records} book moves written to {args.book}')
+        return
+
+    book = OpeningBook(args.book)
+    game = next(read_games(args.sgf))
+    goban = start_position(game)
+    if args.move:
+        for number in replay_steps(goban, game):
+            if number == args.move:
+                break
+    for point, count in book.lookup(goban):
+        print(point, count)
+
+
+if __name__ == "__main__":
+    main()
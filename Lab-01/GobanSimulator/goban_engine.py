@@ -0,0 +1,78 @@
+import copy
+import multiprocessing
+
+from goban_mcts import MCTS, apply_move
+
+PONDER_SLICE = 0.05  # seconds of pondering between checks for a new command
+
+
+def engine_loop(conn, seconds, ponder, options):
+    # Body of the engine process: answer move requests, and between them keep searching
+    # the current position so the tree is already grown when the next request arrives
+    engine = MCTS(**options)
+    goban = None
+    pondering = False
+    try:
+        while True:
+            if not pondering or conn.poll():
+                command, request_id, state = conn.recv()
+                if command == 'quit':
+                    break
+                if command == 'stop':
+                    pondering = False
+                    continue
+                goban = state
+                if command == 'ponder':
+                    pondering = ponder
+                    continue
+                move = engine.best_move(goban, seconds)
+                conn.send((request_id, move, engine.last_stats))
+                apply_move(goban, move)
+                pondering = ponder and not goban.is_over()
+            else:
+                engine.search(goban, PONDER_SLICE)
+    finally:
+        engine.close()
+
+
+class AsyncEngine:
+    # Front end used by the GUI thread: every call returns at once, and the move is picked
+    # up later with poll(). Answers to requests that were superseded are dropped.
+    def __init__(self, seconds=1.0, ponder=True, **options):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=engine_loop, args=(child, seconds, ponder, options))
+        self.process.start()
+        self.request_id = 0
+        self.thinking = False
+        self.last_stats = {}
+
+    def request_move(self, goban):
+        self.request_id += 1
+        self.thinking = True
+        self.conn.send(('think', self.request_id, copy.deepcopy(goban)))
+
+    def ponder(self, goban):
+        self.cancel()
+        self.conn.send(('ponder', self.request_id, copy.deepcopy(goban)))
+
+    def cancel(self):
+        self.request_id += 1
+        self.thinking = False
+        self.conn.send(('stop', self.request_id, None))
+
+    def poll(self):
+        # Returns (True, move) once the current request is answered, move None meaning pass
+        while self.thinking and self.conn.poll():
+            request_id, move, stats = self.conn.recv()
+            if request_id == self.request_id:
+                self.thinking = False
+                self.last_stats = stats
+                return True, move
+        return False, None
+
+    def close(self):
+        if self.process.is_alive():
+            self.conn.send(('quit', None, None))
+            self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,209 @@
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # stdout belongs to the protocol
+
+from goban import Goban
+from goban_mcts import MCTS, move_key
+from goban_playout import KOMI, POLICIES, Playout
+
+COLUMNS = 'ABCDEFGHJKLMNOPQRSTUVWXYZ'  # GTP skips I
+COLORS = {'b': 'B', 'black': 'B', 'w': 'W', 'white': 'W'}
+
+
+class GtpError(Exception):
+    pass
+
+
+def parse_vertex(text, size):
+    # 'D4' -> (row, col) with row 0 at the top as on the Goban; 'pass' -> None
+    text = text.upper()
+    if text == 'PASS':
+        return None
+    try:
+        col = COLUMNS.index(text[0])
+        row = size - int(text[1:])
+    except (IndexError, ValueError):
+        raise GtpError('invalid coordinate')
+    if not (0 <= row < size and 0 <= col < size):
+        raise GtpError('invalid coordinate')
+    return row, col
+
+
+def format_vertex(point, size):
+    if point is None:
+        return 'pass'
+    row, col = point
+    return f'{COLUMNS[col]}{size - row}'
+
+
+def parse_color(text):
+    try:
+        return COLORS[text.lower()]
+    except KeyError:
+        raise GtpError('invalid color')
+
+
+class PlayoutBot:
+    # Stand-in engine for testing: plays one move of a playout policy
+    # without any search
+    def __init__(self, policy='random', seed=None):
+        self.policy = policy
+        self.rng = random.Random(seed)
+
+    def play(self, goban, seconds=None, playouts=None):
+        playout = Playout(goban, self.rng)
+        if not (self.policy != 'random' and playout.tactical_move(self.policy == 'ladder')) and not playout.random_move():
+            goban.pass_move()
+        return move_key(goban.move_history[-1])
+
+    def close(self):
+        pass
+
+
+def make_bot(name, seed=None, workers=1, book=None):
+    if name == 'mcts':
+        return MCTS(workers=workers, seed=seed, book=book)
+    return PlayoutBot(name, seed)
+
+
+class GtpEngine:
+    # One GTP session: handle() takes a command line and returns the full response text
+    def __init__(self, bot, name='goban', seconds=1.0, playouts=None, size=19):
+        self.bot = bot
+        self.name = name
+        self.seconds = seconds
+        self.playouts = playouts
+        self.komi = KOMI
+        self.goban = Goban(size)
+        self.running = True
+        self.commands = {
+            'protocol_version': lambda: '2',
+            'name': lambda: self.name,
+            'version': lambda: '1.0',
+            'known_command': lambda command: 'true' if command in self.commands else 'false',
+            'list_commands': lambda: '\n'.join(self.commands),
+            'quit': self.quit,
+            'boardsize': self.boardsize,
+            'clear_board': self.clear_board,
+            'komi': self.set_komi,
+            'play': self.play,
+            'genmove': self.genmove,
+            'undo': self.undo,
+            'final_score': self.final_score,
+            'showboard': self.showboard,
+            'time_settings': lambda *args: '',
+            'time_left': lambda *args: '',
+        }
+
+    def quit(self):
+        self.running = False
+        return ''
+
+    def boardsize(self, size):
+        size = int(size)
+        if not 2 <= size <= len(COLUMNS):
+            raise GtpError('unacceptable size')
+        self.goban = Goban(size)
+        return ''
+
+    def clear_board(self):
+        self.goban = Goban(self.goban.size)
+        return ''
+
+    def set_komi(self, komi):
+        self.komi = float(komi)
+        if hasattr(self.bot, 'komi'):
+            self.bot.komi = self.komi
+        return ''
+
+    def play(self, color, vertex):
+        goban = self.goban
+        point = parse_vertex(vertex, goban.size)
+        goban.current_player = parse_color(color)
+        if point is None:
+            goban.pass_move()
+        elif not goban.place_stone(*point):
+            raise GtpError('illegal move')
+        return ''
+
+    def genmove(self, color):
+        self.goban.current_player = parse_color(color)
+        move = self.bot.play(self.goban, None if self.playouts else self.seconds, self.playouts)
+        return format_vertex(move, self.goban.size)
+
+    def undo(self):
+        if not self.goban.move_history:
+            raise GtpError('cannot undo')
+        self.goban.undo_move()
+        return ''
+
+    def final_score(self):
+        from goban_score import tromp_taylor
+        score = tromp_taylor(self.goban, self.komi)[2]
+        if score == 0:
+            return '0'
+        return f"{'B' if score > 0 else 'W'}+{abs(score):g}"
+
+    def showboard(self):
+        size = self.goban.size
+        lines = ['   ' + ' '.join(COLUMNS[:size])]
+        for row in range(size):
+            stones = ' '.join('.' if v == ' ' else 'X' if v == 'B' else 'O' for v in self.goban.board[row])
+            lines.append(f'{size - row:2d} {stones}')
+        return '\n' + '\n'.join(lines)
+
+    def handle(self, line):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            return None
+        words = line.split()
+        command_id = ''
+        if words[0].isdigit():
+            command_id = words.pop(0)
+        if not words:
+            return None
+        command, args = words[0], words[1:]
+        try:
+            if command not in self.commands:
+                raise GtpError('unknown command')
+            try:
+                result = self.commands[command](*args)
+            except (TypeError, ValueError):
+                raise GtpError('syntax error')
+        except GtpError as error:
+            return f'?{command_id} {error}\n\n'
+        return f'={command_id} {result}'.rstrip(' ') + '\n\n'
+
+    def run(self, stdin=sys.stdin, stdout=sys.stdout):
+        for line in stdin:
+            response = self.handle(line)
+            if response is None:
+                continue
+            stdout.write(response)
+            stdout.flush()
+            if not self.running:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Go Text Protocol engine over stdin/stdout')
+    parser.add_argument('--engine', choices=POLICIES + ['mcts'], default='mcts')
+    parser.add_argument('--seconds', type=float, default=1.0, help='mcts thinking time per move')
+    parser.add_argument('--playouts', type=int, default=None, help='mcts playouts per move instead of a time budget')
+    parser.add_argument('--workers', type=int, default=1, help='mcts processes, 0 for every core')
+    parser.add_argument('--book', help='opening book file for mcts')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    bot = make_bot(args.engine, args.seed, args.workers, args.book)
+    try:
+        GtpEngine(bot, f'goban-{args.engine}', args.seconds, args.playouts).run()
+    finally:
+        bot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import collections
+import glob
+import itertools
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from goban_sgf import iter_game_texts, parse_game, read_games, replay_steps, start_position
+from goban_symmetry import SymmetricHasher, canonical_hash, pattern_hash
+
+# Each shard holds, per kind, a sorted uint64 key array and a parallel array of where each
+# key occurred. Both are .npy files that are memory-mapped for lookups.
+REF_DTYPE = np.dtype([('game', '<u4'), ('move', '<u2')])
+KINDS = ('positions', 'patterns')
+
+
+def iter_sources(paths):
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as stream:
+            for ordinal, text in enumerate(iter_game_texts(stream)):
+                yield path, ordinal, text
+
+
+def write_table(directory, kind, shard, rows):
+    if not rows:
+        return
+    keys = np.array([row[0] for row in rows], dtype=np.uint64)
+    refs = np.array([row[1:] for row in rows], dtype=REF_DTYPE)
+    order = np.argsort(keys, kind='stable')
+    np.save(os.path.join(directory, f'{kind}-{shard:05d}.keys.npy'), keys[order])
+    np.save(os.path.join(directory, f'{kind}-{shard:05d}.refs.npy'), refs[order])
+
+
+def clean(value):
+    return str(value).replace('\t', ' ').replace('\n', ' ')
+
+
+def build_shard(task):
+    # Replays one batch of games and writes its shard; runs in a pool process
+    directory, shard, first_id, games = task
+    tables = {kind: [] for kind in KINDS}
+    lines = []
+    for game_id, (path, ordinal, text) in enumerate(games, first_id):
+        status = 'ok'
+        properties = {}
+        try:
+            game = parse_game(text)
+            properties = game.properties
+            goban = start_position(game)
+            hasher = SymmetricHasher(goban)
+            for number in replay_steps(goban, game):
+                move = goban.move_history[-1]
+                hasher.update(move)
+                if move.row is None:
+                    continue
+                tables['positions'].append((hasher.canonical(), game_id, number))
+                tables['patterns'].append((pattern_hash(goban, move.row, move.col, move.player), game_id, number))
+        except (ValueError, IndexError) as error:
+            status = f'error: {error}'
+        names = [clean(properties.get(name, [''])[0]) for name in ('PB', 'PW', 'RE')]
+        lines.append('\t'.join([str(game_id), clean(path), str(ordinal)] + names + [clean(status)]))
+
+    for kind in KINDS:
+        write_table(directory, kind, shard, tables[kind])
+    with open(os.path.join(directory, f'games-{shard:05d}.tsv'), 'w', encoding='utf-8') as f:
+        f.write(''.join(line + '\n' for line in lines))
+    return len(games), len(tables['positions'])
+
+
+def shard_files(directory):
+    return [path for pattern in [f'{kind}-*.npy' for kind in KINDS] + ['games-*.tsv']
+            for path in glob.glob(os.path.join(directory, pattern))]
+
+
+def build_index(paths, directory, workers=None, shard_size=5000):
+    # Games are cut into shards of shard_size and each shard is built by one pool process;
+    # at most two shards per worker are in flight, so memory stays bounded. Shards of an
+    # earlier build are removed first, since lookups read every shard in the directory.
+    os.makedirs(directory, exist_ok=True)
+    for path in shard_files(directory):
+        os.remove(path)
+    workers = workers or multiprocessing.cpu_count()
+    sources = iter_sources(paths)
+    tasks = ((directory, shard, shard * shard_size, batch) for shard, batch in
+             enumerate(iter(lambda: list(itertools.islice(sources, shard_size)), [])))
+    stats = {'games': 0, 'positions': 0, 'shards': 0}
+
+    def collect(result):
+        stats['games'] += result[0]
+        stats['positions'] += result[1]
+        stats['shards'] += 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            collect(build_shard(task))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            pending = collections.deque()
+            for task in tasks:
+                pending.append(pool.apply_async(build_shard, (task,)))
+                if len(pending) >= workers * 2:
+                    collect(pending.popleft().get())
+            while pending:
+                collect(pending.popleft().get())
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+class PositionIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}
+        for kind in KINDS:
+            self.tables[kind] = [(np.load(path, mmap_mode='r'), np.load(path.replace('.keys.', '.refs.'), mmap_mode='r'))
+                                 for path in sorted(glob.glob(os.path.join(directory, f'{kind}-*.keys.npy')))]
+        self.games = None
+
+    def lookup(self, kind, key):
+        # Binary search in every shard: [(game_id, move_number), ...]
+        key = np.uint64(key)
+        results = []
+        for keys, refs in self.tables[kind]:
+            lo = np.searchsorted(keys, key, 'left')
+            hi = np.searchsorted(keys, key, 'right')
+            results.extend((int(game), int(move)) for game, move in refs[lo:hi])
+        return results
+
+    def find_position(self, goban):
+        # Games that reached this position, in any of its 8 orientations
+        return self.lookup('positions', canonical_hash(goban))
+
+    def find_pattern(self, goban, row, col, color=None):
+        # Games where a move produced the same 5x5 shape around it; color is the side that
+        # played at (row, col), by default the stone already there
+        if color is None:
+            color = goban.board[row][col] if goban.board[row][col] != ' ' else goban.current_player
+        return self.lookup('patterns', pattern_hash(goban, row, col, color))
+
+    def game(self, game_id):
+        if self.games is None:
+            self.games = {}
+            for path in glob.glob(os.path.join(self.directory, 'games-*.tsv')):
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        fields = line.rstrip('\n').split('\t')
+                        self.games[int(fields[0])] = dict(zip(('id', 'path', 'ordinal', 'PB', 'PW', 'RE', 'status'), fields))
+        return self.games.get(game_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Position and pattern index over SGF collections')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='index SGF files into a directory')
+    build.add_argument('directory')
+    build.add_argument('paths', nargs='+')
+    build.add_argument('--workers', type=int, default=0, help='processes to use, 0 for every core')
+    build.add_argument('--shard-size', type=int, default=5000)
+    query = commands.add_parser('query', help='find games that reached the position of an SGF game')
+    query.add_argument('directory')
+    query.add_argument('sgf')
+    query.add_argument('--move', type=int, default=None, help='stop after this many moves')
+    query.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        stats = build_index(args.paths, args.directory, args.workers, args.shard_size)
+        print(f"{stats['games']} games, {stats['positions']} positions in {stats['shards']} shards, "
+              f"{stats['seconds']:.1f}s ({stats['games'] / stats['seconds']:.0f} games/s)")
+        return
+
+    game = next(read_games(args.sgf))
+    goban = start_position(game)
+    for number in replay_steps(goban, game):
+        if number == args.move:
+            break
+    index = PositionIndex(args.directory)
+    start = time.perf_counter()
+    hits = index.find_position(goban)
+    elapsed = time.perf_counter() - start
+    print(f'{len(hits)} hits in {elapsed * 1000:.2f} ms')
+    for game_id, number in hits[:args.limit]:
+        info = index.game(game_id) or {}
+        print(f"game {game_id} move {number}: {info.get('PB', '')} vs {info.get('PW', '')} {info.get('RE', '')} "
+              f"({info.get('path', '')} #{info.get('ordinal', '')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+
+# A journal is two files. path + '.ckpt' holds a header (magic, generation) and a pickled
+# Goban. path holds a header (magic, generation) followed by fixed 4-byte records
+# (op, color, row, col) for everything done since that checkpoint. Each checkpoint starts
+# a new generation; journal records from an older generation are already in the checkpoint.
+JOURNAL_MAGIC = b'GOJRNL1\0'
+CHECKPOINT_MAGIC = b'GOCKPT1\0'
+HEADER = struct.Struct('<8sQ')
+RECORD = struct.Struct('<cBBB')
+MOVE, PASS, UNDO, NEW = b'M', b'P', b'U', b'N'  # NEW is only read; a new game is checkpointed
+COLORS = 'BW'
+CHECKPOINT_EVERY = 256  # records between checkpoints; bounds the replay on resume
+
+
+def write_atomic(path, data):
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def encode(op, move=None):
+    if move is None:
+        return RECORD.pack(op, 0, 0, 0)
+    color = COLORS.index(move.player)
+    if move.row is None:
+        return RECORD.pack(PASS, color, 0, 0)
+    return RECORD.pack(MOVE, color, move.row, move.col)
+
+
+def read_checkpoint(path):
+    try:
+        with open(path + '.ckpt', 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return 0, None
+    magic, generation = HEADER.unpack_from(data)
+    if magic != CHECKPOINT_MAGIC:
+        raise ValueError(f'{path}.ckpt is not a Goban checkpoint')
+    return generation, pickle.loads(data[HEADER.size:])
+
+
+def read_records(path, generation):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    if len(data) < HEADER.size:
+        return []
+    magic, journal_generation = HEADER.unpack_from(data)
+    if magic != JOURNAL_MAGIC:
+        raise ValueError(f'{path} is not a Goban journal')
+    if journal_generation != generation:
+        return []  # the crash came between a checkpoint and its new journal
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size  # drop a torn last record
+    return list(RECORD.iter_unpack(data[HEADER.size:end]))
+
+
+def resume(path):
+    # The game as it was at the last record that reached the disk, or None if there is none
+    generation, goban = read_checkpoint(path)
+    if goban is None:
+        return None
+    for op, color, row, col in read_records(path, generation):
+        goban.current_player = COLORS[color]
+        if op == MOVE:
+            if not goban.place_stone(row, col):
+                break
+        elif op == PASS:
+            goban.pass_move()
+        elif op == UNDO:
+            goban.undo_move()
+        elif op == NEW:
+            goban.new_game()
+    goban.redo_stack.clear()
+    return goban
+
+
+class Journal:
+    # Records a Goban's moves as they happen. sync() only queues bytes; a background thread
+    # writes them and fsyncs once per batch, so the caller never waits on the disk.
+    def __init__(self, path, goban):
+        self.path = path
+        self.generation = read_checkpoint(path)[0]
+        self.history = []
+        self.setup = None
+        self.since_checkpoint = 0
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.file = None
+        self.thread.start()
+        self.checkpoint(goban)
+
+    def checkpoint(self, goban):
+        self.history = list(goban.move_history)
+        self.setup = goban.setup_stones  # new_game() replaces this list, nothing else does
+        self.since_checkpoint = 0
+        self.queue.put(('checkpoint', pickle.dumps(goban, pickle.HIGHEST_PROTOCOL)))
+
+    def sync(self, goban):
+        # Queue records for whatever changed in goban.move_history since the last call.
+        # History only grows and shrinks at the end, so this costs O(changed moves).
+        if goban.setup_stones is not self.setup:
+            self.checkpoint(goban)  # a new game: its start position goes to disk whole
+            return
+        moves = goban.move_history
+        common = min(len(self.history), len(moves))
+        while common and self.history[common - 1] is not moves[common - 1]:
+            common -= 1
+        if common == len(self.history) == len(moves):
+            return
+        records = [encode(UNDO)] * (len(self.history) - common)
+        records.extend(encode(None, move) for move in moves[common:])
+        del self.history[common:]
+        self.history.extend(moves[common:])
+        self.since_checkpoint += len(records)
+        if self.since_checkpoint >= CHECKPOINT_EVERY:
+            self.checkpoint(goban)
+        else:
+            self.queue.put(('records', b''.join(records)))
+
+    def writer(self):
+        while True:
+            items = [self.queue.get()]
+            while True:  # batch everything already queued under one fsync
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for kind, data in items:
+                if kind == 'checkpoint':
+                    self.rotate(data)
+                elif kind == 'records':
+                    self.file.write(data)
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            if items[-1][0] == 'close':
+                if self.file is not None:
+                    self.file.close()
+                return
+
+    def rotate(self, state):
+        # New checkpoint first, then an empty journal of the same generation: a crash in
+        # between leaves an older journal that resume() knows to skip
+        self.generation += 1
+        write_atomic(self.path + '.ckpt', HEADER.pack(CHECKPOINT_MAGIC, self.generation) + state)
+        if self.file is not None:
+            self.file.close()
+        write_atomic(self.path, HEADER.pack(JOURNAL_MAGIC, self.generation))
+        self.file = open(self.path, 'ab')
+
+    def close(self):
+        self.queue.put(('close', None))
+        self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or time a Goban journal')
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    generation, _ = read_checkpoint(args.path)
+    records = read_records(args.path, generation)
+    start = time.perf_counter()
+    goban = resume(args.path)
+    elapsed = time.perf_counter() - start
+    if goban is None:
+        print('no checkpoint')
+        return
+    print(f'generation {generation}, {len(records)} records after the checkpoint, '
+          f'{len(goban.move_history)} moves, resumed in {elapsed * 1000:.1f} ms')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+from goban import zobrist_table
+from goban_array import ArrayBoard, BORDER, CODES, EMPTY
+
+# Boolean / integer size x size maps for the side to move:
+#   legal      - playing here is allowed (empty, not suicide, not ko, not superko)
+#   liberties  - liberty count of the chain on each stone, 0 on empty points
+#   captures   - playing here captures at least one opponent stone
+MoveMaps = namedtuple('MoveMaps', ['legal', 'liberties', 'captures'])
+
+
+def padded_board(goban):
+    # Board codes with a one-point BORDER frame; zero-copy for the array backend
+    if isinstance(goban.board, ArrayBoard):
+        stride = goban.board.stride
+        return np.frombuffer(goban.board.cells, dtype=np.int8).reshape(stride, stride)
+    codes = np.array([[CODES[v] for v in row] for row in goban.board], dtype=np.int8)
+    return np.pad(codes, 1, constant_values=BORDER)
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_planes(size):
+    table = zobrist_table(size)
+    planes = np.zeros((3, size, size), dtype=np.uint64)
+    for code, color in ((1, 'B'), (2, 'W')):
+        for (row, col), key in table[color].items():
+            planes[code, row, col] = key
+    return planes
+
+
+def neighbor_views(padded):
+    return (padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:])
+
+
+def move_maps(goban):
+    size = goban.size
+    me = CODES[goban.current_player]
+    opponent = CODES[goban.opponent()]
+
+    colors = padded_board(goban)
+    libs = np.zeros(colors.shape, dtype=np.int16)
+    for (row, col), chain in goban.chains.items():
+        libs[row + 1, col + 1] = len(chain.liberties)
+
+    empty = colors[1:-1, 1:-1] == EMPTY
+    has_empty = np.zeros((size, size), dtype=bool)
+    safe_friend = np.zeros((size, size), dtype=bool)
+    captures = np.zeros((size, size), dtype=bool)
+    for c, l in zip(neighbor_views(colors), neighbor_views(libs)):
+        has_empty |= c == EMPTY
+        safe_friend |= (c == me) & (l > 1)
+        captures |= (c == opponent) & (l == 1)
+    captures &= empty
+
+    legal = empty & (has_empty | safe_friend | captures)
+    if goban.ko_point is not None:
+        legal[goban.ko_point] = False
+
+    if goban.superko and len(goban.seen_positions) > 1:
+        # A quiet move only adds one key to the hash, so those are checked in one pass;
+        # the few capturing moves go through Goban.hash_after
+        seen = np.fromiter(goban.seen_positions, dtype=np.uint64, count=len(goban.seen_positions))
+        quiet = legal & ~captures
+        after = np.uint64(goban.position_hash) ^ zobrist_planes(size)[me]
+        legal[quiet & np.isin(after, seen)] = False
+        for row, col in zip(*np.nonzero(legal & captures)):
+            if goban.hash_after(int(row), int(col)) in goban.seen_positions:
+                legal[row, col] = False
+
+    return MoveMaps(legal, libs[1:-1, 1:-1], captures)
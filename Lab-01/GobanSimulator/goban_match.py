@@ -0,0 +1,158 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shlex
+import subprocess
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+from goban import Goban
+from goban_gtp import GtpError, format_vertex, parse_vertex
+from goban_playout import KOMI
+
+GTP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'goban_gtp.py')
+
+
+def bundled_engine(name='random'):
+    return f'{shlex.quote(sys.executable)} {shlex.quote(GTP_SCRIPT)} --engine {name}'
+
+
+class GtpClient:
+    # One engine subprocess spoken to over its stdin/stdout
+    def __init__(self, command):
+        self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True, bufsize=1)
+
+    def send(self, command):
+        self.process.stdin.write(command + '\n')
+        self.process.stdin.flush()
+        lines = []
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f'engine exited during {command!r}')
+            line = line.rstrip('\r\n')
+            if not line and lines:
+                break
+            if line:
+                lines.append(line)
+        response = '\n'.join(lines)
+        if response.startswith('?'):
+            raise RuntimeError(f'{command!r} failed: {response[1:].strip()}')
+        return response[1:].strip()
+
+    def close(self):
+        try:
+            self.send('quit')
+        except (RuntimeError, OSError):
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def play_match_game(args):
+    # Referees one game between two GTP engines on our own Goban. Engines run in their own
+    # processes, so a thread is enough to drive each game.
+    number, black, white, size, komi, max_moves = args  # black, white: (label, command)
+    goban = Goban(size)
+    engines = {'B': GtpClient(black[1]), 'W': GtpClient(white[1])}
+    times = {'B': [], 'W': []}
+    winner, reason, score = None, 'score', None
+    try:
+        for engine in engines.values():
+            engine.send(f'boardsize {size}')
+            engine.send('clear_board')
+            engine.send(f'komi {komi}')
+        while not goban.is_over() and len(goban.move_history) < max_moves:
+            color = goban.current_player
+            other = goban.opponent()
+            start = time.perf_counter()
+            vertex = engines[color].send(f'genmove {color}')
+            times[color].append(time.perf_counter() - start)
+            if vertex.lower() == 'resign':
+                winner, reason = other, 'resign'
+                break
+            point = parse_vertex(vertex, size)
+            if point is None:
+                goban.pass_move()
+            elif not goban.place_stone(*point):
+                winner, reason = other, f'illegal move {vertex}'
+                break
+            engines[other].send(f'play {color} {format_vertex(point, size)}')
+    except (RuntimeError, GtpError) as error:
+        winner, reason = None, f'error: {error}'
+    finally:
+        for engine in engines.values():
+            engine.close()
+
+    if reason == 'score':
+        from goban_score import tromp_taylor
+        score = tromp_taylor(goban, komi)[2]
+        winner = 'B' if score > 0 else 'W' if score < 0 else None
+    return {'game': number, 'black': black[0], 'white': white[0], 'winner': winner, 'reason': reason,
+            'score': score, 'moves': len(goban.move_history), 'times': times}
+
+
+def run_match(engine_a, engine_b, games=10, size=9, komi=KOMI, workers=None, max_moves=None):
+    # Plays games concurrently with colors alternating; engine_a (labelled 'A') is black in even games
+    workers = workers or multiprocessing.cpu_count()
+    max_moves = max_moves or size * size * 3
+    engine_a, engine_b = ('A', engine_a), ('B', engine_b)
+    tasks = [(number, engine_a, engine_b, size, komi, max_moves) if number % 2 == 0 else
+             (number, engine_b, engine_a, size, komi, max_moves) for number in range(games)]
+    with ThreadPool(min(workers, games)) as pool:
+        return pool.map(play_match_game, tasks)
+
+
+def summarize(results):
+    summary = {}
+    for engine in ('A', 'B'):
+        wins = sum(1 for r in results if r['winner'] and r['black' if r['winner'] == 'B' else 'white'] == engine)
+        times = [t for r in results for color in ('B', 'W')
+                 if r['black' if color == 'B' else 'white'] == engine for t in r['times'][color]]
+        summary[engine] = {'wins': wins, 'moves': len(times),
+                           'mean_move_seconds': sum(times) / len(times) if times else 0.0,
+                           'max_move_seconds': max(times, default=0.0)}
+    summary['errors'] = sum(1 for r in results if r['reason'].startswith('error'))
+    summary['draws'] = sum(1 for r in results if r['winner'] is None) - summary['errors']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play GTP engines against each other in parallel')
+    parser.add_argument('engine_a', nargs='?', default=None, help='GTP engine command (default: bundled light bot)')
+    parser.add_argument('engine_b', nargs='?', default=None, help='GTP engine command (default: bundled random bot)')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--komi', type=float, default=KOMI)
+    parser.add_argument('--workers', type=int, default=0, help='games played at once, 0 for every core')
+    parser.add_argument('--json', help='write every game result and the summary to this file')
+    args = parser.parse_args()
+
+    engine_a = args.engine_a or bundled_engine('light')
+    engine_b = args.engine_b or bundled_engine('random')
+    start = time.perf_counter()
+    results = run_match(engine_a, engine_b, args.games, args.size, args.komi, args.workers)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results)
+
+    for r in results:
+        result = f"{r['winner']}+{abs(r['score']):g}" if r['score'] else f"{r['winner']} ({r['reason']})"
+        print(f"game {r['game']:3d}: {result:20s} {r['moves']:4d} moves")
+    for name, engine in (('A', engine_a), ('B', engine_b)):
+        stats = summary[name]
+        print(f"{name} {stats['wins']} wins, {stats['mean_move_seconds'] * 1000:.1f} ms/move mean, "
+              f"{stats['max_move_seconds'] * 1000:.1f} ms max: {engine}")
+    print(f"{summary['draws']} draws, {summary['errors']} errors, {elapsed:.1f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'engines': {'A': engine_a, 'B': engine_b}, 'summary': summary, 'games': results,
+                       'seconds': elapsed}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
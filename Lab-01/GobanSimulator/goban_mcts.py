@@ -0,0 +1,216 @@
+import argparse
+import copy
+import math
+import multiprocessing
+import random
+import time
+
+from goban import Goban
+from goban_book import OpeningBook
+from goban_playout import KOMI, Playout, is_eye
+from goban_score import tromp_taylor
+
+
+def move_key(move):
+    return None if move.row is None else (move.row, move.col)
+
+
+def apply_move(goban, move):
+    if move is None:
+        return goban.pass_move()
+    return goban.place_stone(*move)
+
+
+class Node:
+    # One position in the search tree; wins are counted for the player who moved into it
+    __slots__ = ('move', 'player', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, player, parent):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.untried = None  # filled in the first time the node is expanded
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTS:
+    def __init__(self, exploration=1.4, policy='light', komi=KOMI, workers=1, seed=None, book=None):
+        self.exploration = exploration
+        self.book = OpeningBook(book) if book else None  # path of an opening book file
+        self.policy = policy
+        self.komi = komi
+        self.workers = workers or multiprocessing.cpu_count()
+        self.rng = random.Random(seed)
+        self.root = None
+        self.root_path = None  # moves from the start of the game to the root
+        self.pool = None
+        self.last_stats = {}
+
+    def sync(self, goban):
+        # Keep the subtree below the moves played since the last search, if we searched them
+        path = [move_key(move) for move in goban.move_history]
+        if self.root is not None and len(path) >= len(self.root_path) and path[:len(self.root_path)] == self.root_path:
+            node = self.root
+            for move in path[len(self.root_path):]:
+                node = node.children.get(move)
+                if node is None:
+                    break
+            if node is not None:
+                node.parent = None
+                self.root, self.root_path = node, path
+                return
+        self.root, self.root_path = Node(None, goban.opponent(), None), path
+
+    def candidate_moves(self, goban):
+        player = goban.current_player
+        moves = [(r, c) for r in range(goban.size) for c in range(goban.size)
+                 if goban.is_valid_move(r, c) and not goban.is_suicide(r, c) and not is_eye(goban, (r, c), player)]
+        self.rng.shuffle(moves)
+        return moves or [None]
+
+    def select(self, node):
+        log_visits = math.log(node.visits)
+        best, best_value = None, -1.0
+        for child in node.children.values():
+            value = child.wins / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def iterate(self, goban):
+        base = len(goban.move_history)
+        node = self.root
+        while node.untried == [] and node.children and not goban.is_over():
+            node = self.select(node)
+            apply_move(goban, node.move)
+
+        if not goban.is_over():
+            if node.untried is None:
+                node.untried = self.candidate_moves(goban)
+            while node.untried:
+                move = node.untried.pop()
+                player = goban.current_player
+                if apply_move(goban, move):
+                    child = Node(move, player, node)
+                    node.children[move] = child
+                    node = child
+                    break
+            else:
+                if not node.children:
+                    node.untried.append(None)  # every candidate broke superko; passing is always legal
+
+            Playout(goban, self.rng).run(self.policy)
+        winner = 'B' if tromp_taylor(goban, self.komi)[2] > 0 else 'W'
+
+        while node is not None:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+            node = node.parent
+        for _ in range(len(goban.move_history) - base):
+            goban.undo_move()
+        goban.redo_stack.clear()
+
+    def search(self, goban, seconds=None, playouts=None):
+        self.sync(goban)
+        board = copy.deepcopy(goban)
+        board.redo_stack = []
+        reused = self.root.visits
+        start = time.perf_counter()
+        count = 0
+        while (playouts is None or count < playouts) and (seconds is None or time.perf_counter() - start < seconds):
+            self.iterate(board)
+            count += 1
+        elapsed = time.perf_counter() - start
+        self.last_stats = {'playouts': count, 'seconds': elapsed, 'reused_visits': reused,
+                           'playouts_per_sec': count / elapsed if elapsed else 0.0}
+        return {move: (child.visits, child.wins) for move, child in self.root.children.items()}
+
+    def best_move(self, goban, seconds=None, playouts=None):
+        # Returns (row, col), or None to pass. With workers > 1 the other processes search
+        # their own trees from the same position and their root statistics are summed in.
+        if seconds is None and playouts is None:
+            seconds = 1.0
+        if self.book is not None:
+            move = self.book.best_move(goban)
+            if move is not None:
+                self.last_stats = {'playouts': 0, 'seconds': 0.0, 'reused_visits': 0, 'playouts_per_sec': 0.0, 'book': True}
+                return move
+        if self.workers == 1:
+            totals = self.search(goban, seconds, playouts)
+        else:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.workers - 1)
+            share = None if playouts is None else max(1, playouts // self.workers)
+            seeds = [self.rng.getrandbits(32) for _ in range(self.workers - 1)]
+            start = time.perf_counter()  # wall clock of the whole pool search, for playouts_per_sec
+            pending = self.pool.map_async(search_worker, [(goban, seconds, share, self.policy, self.komi, seed)
+                                                          for seed in seeds])
+            totals = self.search(goban, seconds, share)
+            local = self.last_stats
+            count = local['playouts']
+            for stats, playout_count in pending.get():
+                count += playout_count
+                for move, (visits, wins) in stats.items():
+                    v, w = totals.get(move, (0, 0))
+                    totals[move] = (v + visits, w + wins)
+            elapsed = time.perf_counter() - start
+            self.last_stats = dict(local, playouts=count, seconds=elapsed,
+                                   playouts_per_sec=count / elapsed if elapsed else 0.0)
+
+        if not totals:
+            return None
+        return max(totals, key=lambda move: totals[move][0])
+
+    def play(self, goban, seconds=None, playouts=None):
+        move = self.best_move(goban, seconds, playouts)
+        apply_move(goban, move)
+        return move
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+_worker_engine = None
+
+
+def search_worker(args):
+    # Runs in a pool process; the engine persists there so its subtree is reused too
+    global _worker_engine
+    goban, seconds, playouts, policy, komi, seed = args
+    if _worker_engine is None:
+        _worker_engine = MCTS(policy=policy, komi=komi, seed=seed)
+    stats = _worker_engine.search(goban, seconds, playouts)
+    return stats, _worker_engine.last_stats['playouts']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MCTS self-play on a headless Goban')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--seconds', type=float, default=1.0, help='thinking time per move')
+    parser.add_argument('--playouts', type=int, default=None, help='playouts per move instead of a time budget')
+    parser.add_argument('--workers', type=int, default=1, help='processes per move, 0 for every core')
+    args = parser.parse_args()
+
+    goban = Goban(args.size)
+    engine = MCTS(workers=args.workers)
+    seconds = None if args.playouts else args.seconds
+    try:
+        while not goban.is_over() and len(goban.move_history) < args.size * args.size * 2:
+            player = goban.current_player
+            move = engine.play(goban, seconds, args.playouts)
+            stats = engine.last_stats
+            print(f"{len(goban.move_history):3d} {player} {'pass' if move is None else move}"
+                  f"  {stats['playouts']} playouts, {stats['playouts_per_sec']:.0f}/s, reused {stats['reused_visits']}")
+    finally:
+        engine.close()
+    print(f'score (B-W): {tromp_taylor(goban)[2]:+.1f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import functools
+import multiprocessing
+import random
+import time
+
+from goban import Goban
+from goban_tactics import TacticalReader
+
+KOMI = 7.5
+POLICIES = ['random', 'light', 'ladder']
+TACTICS = TacticalReader()  # shared by every playout in the process
+
+
+@functools.lru_cache(maxsize=None)
+def diagonal_table(size):
+    table = {}
+    for row in range(size):
+        for col in range(size):
+            table[(row, col)] = tuple((row + dr, col + dc) for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+                                      if 0 <= row + dr < size and 0 <= col + dc < size)
+    return table
+
+
+def is_eye(goban, point, color):
+    # A point surrounded by color whose diagonals are also (mostly) held; playouts never fill these
+    for r, c in goban.neighbors[point]:
+        if goban.board[r][c] != color:
+            return False
+    diagonals = diagonal_table(goban.size)[point]
+    enemy = sum(1 for r, c in diagonals if goban.board[r][c] not in (color, ' '))
+    if len(diagonals) < 4:
+        return enemy == 0
+    return enemy <= 1
+
+
+class Playout:
+    # Plays one game to the end from the current position of goban, keeping the list of
+    # empty points up to date from each move's captures instead of rescanning the board
+    def __init__(self, goban, rng):
+        self.goban = goban
+        self.rng = rng
+        self.empties = [(r, c) for r in range(goban.size) for c in range(goban.size) if goban.board[r][c] == ' ']
+        self.slot = {point: i for i, point in enumerate(self.empties)}
+
+    def fill(self, point):
+        i = self.slot.pop(point)
+        last = self.empties.pop()
+        if last != point:
+            self.empties[i] = last
+            self.slot[last] = i
+
+    def free(self, point):
+        self.slot[point] = len(self.empties)
+        self.empties.append(point)
+
+    def try_move(self, point):
+        goban = self.goban
+        if is_eye(goban, point, goban.current_player):
+            return False
+        if not goban.place_stone(*point):
+            return False
+        self.fill(point)
+        for stone in goban.move_history[-1].captured:
+            self.free(stone)
+        return True
+
+    def random_move(self):
+        # Try empty points in random order; swap each rejected one out of the sampling range
+        empties = self.empties
+        n = len(empties)
+        while n:
+            i = self.rng.randrange(n)
+            point = empties[i]
+            if self.try_move(point):
+                return True
+            n -= 1
+            empties[i], empties[n] = empties[n], empties[i]
+            self.slot[empties[i]] = i
+            self.slot[empties[n]] = n
+        return False
+
+    def tactical_move(self, ladders=False):
+        # Light policy: capture a chain left in atari next to the last move, else extend
+        # our own chain that the last move put in atari. With ladders, only run from atari
+        # when the reader finds a way out, then chase chains the last move left in a ladder.
+        goban = self.goban
+        if not goban.move_history or goban.move_history[-1].row is None:
+            return False
+        last = goban.move_history[-1]
+        captures, escapes, chases = [], [], []
+        for point in ((last.row, last.col),) + goban.neighbors[(last.row, last.col)]:
+            chain = goban.chains.get(point)
+            if chain is None or len(chain.liberties) > 2:
+                continue
+            if len(chain.liberties) == 2:
+                if ladders and chain.color != goban.current_player:
+                    chases.append(point)
+                continue
+            liberty = next(iter(chain.liberties))
+            if chain.color != goban.current_player:
+                captures.append(liberty)
+            elif not ladders:
+                escapes.append(liberty)
+            else:
+                escape = TACTICS.escape(goban, *point)
+                if escape is not None:
+                    escapes.append(escape)
+        for point in captures + escapes:
+            if self.try_move(point):
+                return True
+        for point in chases:
+            move = TACTICS.ladder(goban, *point)
+            if move is not None and self.try_move(move):
+                return True
+        return False
+
+    def run(self, policy='random', max_moves=None):
+        goban = self.goban
+        if max_moves is None:
+            max_moves = goban.size * goban.size * 3
+        moves = 0
+        while not goban.is_over() and moves < max_moves:
+            if not (policy != 'random' and self.tactical_move(policy == 'ladder')) and not self.random_move():
+                goban.pass_move()
+            moves += 1
+        return moves
+
+
+def play_game(size=9, policy='random', seed=None, komi=KOMI, superko=False):
+    from goban_score import tromp_taylor  # goban_score imports this module
+
+    goban = Goban(size, superko=superko)
+    rng = random.Random(seed)
+    moves = Playout(goban, rng).run(policy)
+    score = tromp_taylor(goban, komi)[2]
+    captures = sum(len(move.captured) for move in goban.move_history)
+    return {'moves': moves, 'score': score, 'winner': 'B' if score > 0 else 'W', 'captures': captures}
+
+
+def play_games(args):
+    size, policy, seeds = args
+    return [play_game(size, policy, seed) for seed in seeds]
+
+
+def run_batch(games, size=9, policy='random', workers=None, seed=0, chunk=16):
+    # Spread seeded games over a process pool; the same seed always gives the same results
+    workers = workers or multiprocessing.cpu_count()
+    seeds = list(range(seed, seed + games))
+    tasks = [(size, policy, seeds[i:i + chunk]) for i in range(0, games, chunk)]
+    start = time.perf_counter()
+    if workers == 1:
+        batches = map(play_games, tasks)
+        results = [result for batch in batches for result in batch]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = [result for batch in pool.imap_unordered(play_games, tasks) for result in batch]
+    elapsed = time.perf_counter() - start
+
+    total_moves = sum(r['moves'] for r in results)
+    return {
+        'games': games,
+        'size': size,
+        'policy': policy,
+        'workers': workers,
+        'seconds': elapsed,
+        'games_per_sec': games / elapsed if elapsed else 0.0,
+        'moves_per_sec': total_moves / elapsed if elapsed else 0.0,
+        'black_wins': sum(1 for r in results if r['winner'] == 'B'),
+        'white_wins': sum(1 for r in results if r['winner'] == 'W'),
+        'mean_moves': total_moves / games if games else 0.0,
+        'mean_score': sum(r['score'] for r in results) / games if games else 0.0,
+        'mean_captures': sum(r['captures'] for r in results) / games if games else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless Goban self-play')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--policy', choices=POLICIES, default='random')
+    parser.add_argument('--workers', type=int, default=0, help='processes to use, 0 for every core')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stats = run_batch(args.games, args.size, args.policy, args.workers, args.seed)
+    for key, value in stats.items():
+        print(f'{key:>14}: {value:.2f}' if isinstance(value, float) else f'{key:>14}: {value}')
+
+
+if __name__ == "__main__":
+    main()
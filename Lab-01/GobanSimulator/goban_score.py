@@ -0,0 +1,112 @@
+import argparse
+import copy
+import multiprocessing
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from goban import Goban
+from goban_array import BLACK, EMPTY, WHITE
+from goban_maps import neighbor_views, padded_board
+from goban_playout import KOMI, Playout
+
+# ownership: size x size floats in [-1, 1], P(black owns the point) - P(white owns it)
+# score: mean Tromp-Taylor score (black - white - komi) over the playouts
+Estimate = namedtuple('Estimate', ['ownership', 'score'])
+
+
+def reach(colors, color):
+    # Points of color plus every empty point connected to them, by repeated one-step
+    # dilation through empty points until nothing changes
+    empty = colors == EMPTY
+    region = colors == color
+    while True:
+        grown = region.copy()
+        for view in neighbor_views(region):
+            grown[1:-1, 1:-1] |= view
+        grown &= empty | region
+        if np.array_equal(grown, region):
+            return region[1:-1, 1:-1]
+        region = grown
+
+
+def area_map(goban):
+    # +1 for points that count for black, -1 for white, 0 for empty points reaching both
+    colors = padded_board(goban)
+    black = reach(colors, BLACK)
+    white = reach(colors, WHITE)
+    return black.astype(np.int8) - white.astype(np.int8)
+
+
+def tromp_taylor(goban, komi=KOMI):
+    # (black area, white area, black - white - komi)
+    areas = area_map(goban)
+    black = int(np.count_nonzero(areas == 1))
+    white = int(np.count_nonzero(areas == -1))
+    return black, white, black - white - komi
+
+
+def ownership_batch(args):
+    goban, playouts, policy, komi, seed = args
+    board = copy.deepcopy(goban)
+    board.redo_stack = []
+    base = len(board.move_history)
+    rng = random.Random(seed)
+    total = np.zeros((goban.size, goban.size), dtype=np.int32)
+    score = 0.0
+    for _ in range(playouts):
+        Playout(board, rng).run(policy)
+        areas = area_map(board)
+        total += areas
+        score += int(areas.sum()) - komi
+        for _ in range(len(board.move_history) - base):
+            board.undo_move()
+        board.redo_stack.clear()
+    return total, score
+
+
+def ownership(goban, playouts=100, policy='light', komi=KOMI, workers=1, seed=None):
+    # Monte Carlo ownership: play the position out many times and average the final areas.
+    # With workers > 1 the playouts are split over a process pool; 0 uses every core.
+    workers = workers or multiprocessing.cpu_count()
+    rng = random.Random(seed)
+    if workers == 1:
+        results = [ownership_batch((goban, playouts, policy, komi, rng.getrandbits(32)))]
+    else:
+        shares = [playouts // workers + (i < playouts % workers) for i in range(workers)]
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(ownership_batch, [(goban, share, policy, komi, rng.getrandbits(32))
+                                                 for share in shares if share])
+    total = sum(r[0] for r in results)
+    score = sum(r[1] for r in results)
+    return Estimate(total / playouts, score / playouts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a Goban position or SGF game')
+    parser.add_argument('sgf', nargs='?', help='score the end of this game instead of a random playout')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--playouts', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=1, help='processes to use, 0 for every core')
+    args = parser.parse_args()
+
+    if args.sgf:
+        from goban_sgf import load
+        goban = load(args.sgf)
+    else:
+        goban = Goban(args.size)
+        Playout(goban, random.Random(0)).run('light')
+        for _ in range(len(goban.move_history) // 2):
+            goban.undo_move()
+
+    black, white, score = tromp_taylor(goban)
+    print(f'area: B {black}  W {white}  score {score:+.1f}')
+    estimate = ownership(goban, args.playouts, workers=args.workers)
+    print(f'estimated score {estimate.score:+.1f}')
+    for row in estimate.ownership:
+        print(' '.join('X' if v > 0.5 else 'O' if v < -0.5 else '.' for v in row))
+
+
+if __name__ == "__main__":
+    main()
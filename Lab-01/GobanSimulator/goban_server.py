@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import select
+import socket
+
+from goban import Goban
+
+# Protocol: one JSON object per line in both directions.
+# Client -> server:
+#   {"op": "create", "size": 19, "colors": ["B"]}    new game, joined at once
+#   {"op": "join", "game": 3, "colors": ["W"]}       colors to sit at; default the first free seat, [] to watch
+#   {"op": "play", "game": 3, "row": 3, "col": 3}    {"op": "pass", "game": 3}    {"op": "undo", "game": 3}
+#   {"op": "list"}
+# Server -> client:
+#   {"op": "joined", "game": 3, "size": 19, "colors": ["W"], "moves": [delta, ...]}
+#   delta: {"op": "move", "game": 3, "number": 12, "player": "B", "point": [3, 3] or null, "captured": [[r, c], ...]}
+#   {"op": "undo", "game": 3, "number": 11}     {"op": "games", "games": {...}}     {"op": "error", "message": "..."}
+# Clients only ever receive move deltas and capture lists; each keeps its own Goban in step with them.
+PORT = 7319
+
+
+def move_delta(game_id, number, move):
+    return {'op': 'move', 'game': game_id, 'number': number, 'player': move.player,
+            'point': None if move.row is None else [move.row, move.col],
+            'captured': [list(point) for point in move.captured]}
+
+
+class Game:
+    # A game costs its Goban and nothing else while idle: there is no task per game
+    def __init__(self, game_id, size):
+        self.id = game_id
+        self.goban = Goban(size)
+        self.seats = {'B': None, 'W': None}
+        self.watchers = set()
+
+    def deltas(self):
+        return [move_delta(self.id, number, move) for number, move in enumerate(self.goban.move_history, 1)]
+
+
+class GobanServer:
+    def __init__(self):
+        self.games = {}
+        self.ids = itertools.count(1)
+        self.joined = collections.defaultdict(set)  # writer -> games it follows
+        self.port = None  # the port actually bound, once started; serve on port 0 picks a free one
+
+    def send(self, writer, message):
+        writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    def broadcast(self, game, message):
+        data = json.dumps(message, separators=(',', ':')).encode() + b'\n'
+        for writer in game.watchers:
+            writer.write(data)
+
+    def join(self, writer, game, colors):
+        if colors is None:
+            colors = [color for color in 'BW' if game.seats[color] is None][:1]
+        granted = [color for color in colors if color in game.seats and game.seats[color] in (None, writer)]
+        for color in granted:
+            game.seats[color] = writer
+        game.watchers.add(writer)
+        self.joined[writer].add(game)
+        self.send(writer, {'op': 'joined', 'game': game.id, 'size': game.goban.size,
+                           'colors': granted, 'moves': game.deltas()})
+
+    def leave(self, writer):
+        for game in self.joined.pop(writer, ()):
+            game.watchers.discard(writer)
+            for color, seat in game.seats.items():
+                if seat is writer:
+                    game.seats[color] = None
+
+    def dispatch(self, writer, message):
+        op = message.get('op')
+        if op == 'create':
+            size = int(message.get('size', 19))
+            if not 2 <= size <= 25:
+                raise ValueError('unacceptable size')
+            game = Game(next(self.ids), size)
+            self.games[game.id] = game
+            self.join(writer, game, message.get('colors'))
+            return
+        if op == 'list':
+            self.send(writer, {'op': 'games', 'games': {game.id: {'size': game.goban.size, 'moves': len(game.goban.move_history),
+                                                                   'free': [c for c, s in game.seats.items() if s is None]}
+                                                         for game in self.games.values()}})
+            return
+
+        game = self.games.get(message.get('game'))
+        if game is None:
+            raise ValueError('no such game')
+        goban = game.goban
+        if op == 'join':
+            self.join(writer, game, message.get('colors'))
+        elif op in ('play', 'pass'):
+            if game.seats[goban.current_player] is not writer:
+                raise ValueError('not your turn')
+            if op == 'pass':
+                goban.pass_move()
+            elif not goban.place_stone(int(message['row']), int(message['col'])):
+                raise ValueError('illegal move')
+            self.broadcast(game, move_delta(game.id, len(goban.move_history), goban.move_history[-1]))
+        elif op == 'undo':
+            if writer not in game.seats.values() or not goban.move_history:
+                raise ValueError('cannot undo')
+            goban.undo_move()
+            goban.redo_stack.clear()
+            self.broadcast(game, {'op': 'undo', 'game': game.id, 'number': len(goban.move_history)})
+        else:
+            raise ValueError(f'unknown op {op!r}')
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError('expected a JSON object')
+                    self.dispatch(writer, message)
+                except (ValueError, KeyError, TypeError) as error:
+                    self.send(writer, {'op': 'error', 'message': str(error)})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(writer)
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    async def serve(self, host='127.0.0.1', port=PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class GameClient:
+    # Client for the pygame loop: requests return at once, and poll() applies whatever
+    # deltas the server has sent since to the local Goban
+    def __init__(self, host='127.0.0.1', port=PORT):
+        self.sock = socket.create_connection((host, port))
+        self.buffer = b''
+        self.pending = collections.deque()
+        self.game = None
+        self.colors = []
+        self.goban = None
+        self.errors = []
+
+    def request(self, **message):
+        self.sock.sendall(json.dumps(message).encode() + b'\n')
+
+    def wait_joined(self):
+        while True:
+            if not self.pending:
+                self.receive(None)
+            message = self.pending.popleft()
+            if message['op'] == 'error':
+                raise ValueError(message['message'])
+            self.apply(message)
+            if message['op'] == 'joined':
+                return self.goban
+
+    def create(self, size=19, colors=None):
+        self.request(op='create', size=size, colors=colors)
+        return self.wait_joined()
+
+    def join(self, game_id, colors=None):
+        self.request(op='join', game=game_id, colors=colors)
+        return self.wait_joined()
+
+    def play(self, row, col):
+        self.request(op='play', game=self.game, row=row, col=col)
+
+    def pass_move(self):
+        self.request(op='pass', game=self.game)
+
+    def undo(self):
+        self.request(op='undo', game=self.game)
+
+    def receive(self, timeout=0):
+        # Queues whatever complete messages arrive within timeout seconds (None: until some do)
+        while select.select([self.sock], [], [], timeout)[0]:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError('server closed the connection')
+            self.buffer += data
+            *lines, self.buffer = self.buffer.split(b'\n')
+            self.pending.extend(json.loads(line) for line in lines if line)
+            if self.pending:
+                return
+
+    def apply(self, message):
+        op = message['op']
+        if op == 'joined':
+            self.game = message['game']
+            self.colors = message['colors']
+            if self.goban is None or self.goban.size != message['size']:
+                self.goban = Goban(message['size'])
+            else:
+                self.goban.new_game()  # keep the object the GUI draws from
+            for delta in message['moves']:
+                self.apply(delta)
+        elif op == 'error':
+            self.errors.append(message['message'])
+        elif message.get('game') != self.game:
+            return
+        elif op == 'move':
+            goban = self.goban
+            goban.current_player = message['player']
+            if message['point'] is None:
+                goban.pass_move()
+            elif not goban.place_stone(*message['point']) or \
+                    sorted(goban.move_history[-1].captured) != sorted(map(tuple, message['captured'])):
+                self.errors.append(f"out of sync at move {message['number']}")
+        elif op == 'undo':
+            while len(self.goban.move_history) > message['number']:
+                self.goban.undo_move()
+            self.goban.redo_stack.clear()
+
+    def poll(self):
+        # Applies pending messages; returns how many there were
+        self.receive()
+        count = len(self.pending)
+        while self.pending:
+            self.apply(self.pending.popleft())
+        return count
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve many Goban games over asyncio')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    print(f'serving on {args.host}:{args.port}')
+    try:
+        asyncio.run(GobanServer().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import argparse
+import itertools
+import multiprocessing
+import re
+import time
+
+from goban import Goban
+
+SPECIAL = re.compile(r'[()\[\]\\]')
+TOKEN = re.compile(r'\s*(?:(\()|(\))|(;)|([A-Za-z]+)\s*((?:\[(?:[^\]\\]|\\.)*\]\s*)+))', re.S)
+VALUE = re.compile(r'\[((?:[^\]\\]|\\.)*)\]', re.S)
+ESCAPE = re.compile(r'\\(.)', re.S)
+
+
+class SgfNode:
+    __slots__ = ('properties', 'children')
+
+    def __init__(self):
+        self.properties = {}  # identifier -> list of values
+        self.children = []
+
+
+class SgfGame:
+    def __init__(self, root):
+        self.root = root
+        self.properties = root.properties
+
+    def get(self, name, default=None):
+        values = self.properties.get(name)
+        return values[0] if values else default
+
+    @property
+    def size(self):
+        return int(self.get('SZ', '19').split(':')[0])
+
+    @property
+    def komi(self):
+        try:
+            return float(self.get('KM', '0'))
+        except ValueError:
+            return 0.0
+
+    def setup_stones(self):
+        stones = []
+        for name, color in (('AB', 'B'), ('AW', 'W')):
+            for value in self.properties.get(name, []):
+                stones.extend((row, col, color) for row, col in expand_points(value, self.size))
+        return stones
+
+    def moves(self):
+        # Main line only: (color, (row, col)), with None as the point for a pass
+        node = self.root
+        while node is not None:
+            for color in ('B', 'W'):
+                if color in node.properties:
+                    moves_here = node.properties[color]
+                    yield color, decode_point(moves_here[0], self.size)
+            node = node.children[0] if node.children else None
+
+
+def decode_point(value, size):
+    if value == '' or (value == 'tt' and size <= 19):
+        return None
+    if len(value) != 2:
+        raise ValueError(f'bad point {value!r}')
+    row, col = ord(value[1]) - 97, ord(value[0]) - 97
+    if not (0 <= row < size and 0 <= col < size):
+        raise ValueError(f'point {value!r} is off the {size}x{size} board')
+    return row, col
+
+
+def encode_point(row, col):
+    return chr(97 + col) + chr(97 + row)
+
+
+def expand_points(value, size):
+    # AB/AW values may be compressed rectangles such as 'aa:cc'
+    if ':' not in value:
+        point = decode_point(value, size)
+        return [] if point is None else [point]
+    (r1, c1), (r2, c2) = decode_point(value[:2], size), decode_point(value[3:5], size)
+    return [(r, c) for r in range(min(r1, r2), max(r1, r2) + 1) for c in range(min(c1, c2), max(c1, c2) + 1)]
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace(']', '\\]')
+
+
+def iter_game_texts(stream, chunk_size=1 << 16):
+    # Yields the text of each top-level game tree of a collection, reading the stream in
+    # chunks so only one game is held in memory at a time. Only the SGF control characters
+    # are visited; brackets inside property values (and escaped ones) are skipped.
+    depth = 0
+    in_value = False
+    skip = -1
+    offset = 0
+    parts = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        for match in SPECIAL.finditer(chunk):
+            pos = offset + match.start()
+            if pos == skip:
+                continue
+            ch = match.group()
+            if in_value:
+                if ch == '\\':
+                    skip = pos + 1
+                elif ch == ']':
+                    in_value = False
+            elif ch == '[':
+                in_value = True
+            elif ch == '(':
+                if depth == 0:
+                    start = match.start()
+                    parts = []
+                depth += 1
+            elif ch == ')' and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    parts.append(chunk[start:match.end()])
+                    yield ''.join(parts)
+                    parts = []
+        if depth > 0:
+            parts.append(chunk[start:])
+        offset += len(chunk)
+
+
+def parse_game(text):
+    root = current = None
+    stack = []
+    for match in TOKEN.finditer(text):
+        open_, close, semicolon, ident, values = match.groups()
+        if open_:
+            stack.append(current)
+        elif close:
+            if stack:
+                current = stack.pop()
+        elif semicolon:
+            node = SgfNode()
+            if current is None:
+                root = root or node
+            else:
+                current.children.append(node)
+            current = node
+        elif current is not None:
+            ident = ''.join(ch for ch in ident if ch.isupper())  # FF[3] long names such as AddBlack
+            current.properties.setdefault(ident, []).extend(ESCAPE.sub(r'\1', v) for v in VALUE.findall(values))
+    if root is None:
+        raise ValueError('no game tree in SGF text')
+    return SgfGame(root)
+
+
+def read_games(path, encoding='utf-8'):
+    with open(path, encoding=encoding, errors='replace') as stream:
+        for text in iter_game_texts(stream):
+            yield parse_game(text)
+
+
+def iter_collection_texts(paths):
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as stream:
+            yield from iter_game_texts(stream)
+
+
+def start_position(game, superko=False, backend='list'):
+    goban = Goban(game.size, superko=superko, backend=backend)
+    stones = game.setup_stones()
+    seen = set()
+    for row, col, color in stones:
+        if (row, col) in seen:
+            raise ValueError(f'setup stone on an occupied point: A{color}[{encode_point(row, col)}]')
+        seen.add((row, col))
+    goban.place_setup_stones(stones)
+    if game.get('PL') in ('B', 'W'):
+        goban.current_player = game.get('PL')
+    return goban
+
+
+def replay_steps(goban, game):
+    # Plays the main line through the rules engine, yielding the move number after each
+    # move; raises ValueError on the first illegal move
+    for number, (color, point) in enumerate(game.moves(), 1):
+        goban.current_player = color
+        if point is None:
+            goban.pass_move()
+        elif not goban.place_stone(*point):
+            raise ValueError(f'illegal move {number}: {color}[{encode_point(*point)}]')
+        yield number
+
+
+def replay(game, superko=False, backend='list'):
+    goban = start_position(game, superko, backend)
+    for _ in replay_steps(goban, game):
+        pass
+    return goban
+
+
+def load(path):
+    return replay(next(read_games(path)))
+
+
+def dumps(goban, **properties):
+    root = {'GM': 1, 'FF': 4, 'CA': 'UTF-8', 'SZ': goban.size}
+    root.update(properties)
+    text = ';' + ''.join(f'{name}[{escape(value)}]' for name, value in root.items())
+    for color in ('B', 'W'):
+        stones = [encode_point(row, col) for row, col, c in goban.setup_stones if c == color]
+        if stones:
+            text += 'A' + color + ''.join(f'[{stone}]' for stone in stones)
+    for move in goban.move_history:
+        text += f";{move.player}[{'' if move.row is None else encode_point(move.row, move.col)}]"
+    return f'({text})\n'
+
+
+def save(goban, path, **properties):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(dumps(goban, **properties))
+
+
+def replay_text(text):
+    try:
+        goban = replay(parse_game(text))
+    except (ValueError, IndexError) as error:
+        return False, 0, str(error)
+    return True, len(goban.move_history), None
+
+
+def replay_collection(paths, workers=None, batch_size=2048):
+    # Streams every game of every file through the rules engine on a process pool.
+    # Games are sent in bounded batches so memory stays flat on very large archives.
+    workers = workers or multiprocessing.cpu_count()
+    texts = iter_collection_texts(paths)
+    stats = {'games': 0, 'valid': 0, 'invalid': 0, 'moves': 0, 'errors': []}
+    start = time.perf_counter()
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        while True:
+            batch = list(itertools.islice(texts, batch_size))
+            if not batch:
+                break
+            if pool is None:
+                results = map(replay_text, batch)
+            else:
+                results = pool.map(replay_text, batch, chunksize=max(1, len(batch) // (workers * 4)))
+            for ok, moves, error in results:
+                stats['games'] += 1
+                stats['moves'] += moves
+                if ok:
+                    stats['valid'] += 1
+                else:
+                    stats['invalid'] += 1
+                    if len(stats['errors']) < 20:
+                        stats['errors'].append(f"game {stats['games']}: {error}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = elapsed
+    stats['games_per_sec'] = stats['games'] / elapsed if elapsed else 0.0
+    stats['moves_per_sec'] = stats['moves'] / elapsed if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay SGF collections through the Goban rules engine')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--workers', type=int, default=0, help='processes to use, 0 for every core')
+    args = parser.parse_args()
+
+    stats = replay_collection(args.paths, args.workers)
+    for error in stats.pop('errors'):
+        print(error)
+    for key, value in stats.items():
+        print(f'{key:>14}: {value:.2f}' if isinstance(value, float) else f'{key:>14}: {value}')
+
+
+if __name__ == "__main__":
+    main()
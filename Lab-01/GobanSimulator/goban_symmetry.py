@@ -0,0 +1,116 @@
+import functools
+import random
+
+from goban import zobrist_table
+
+# The 8 symmetries of the square as maps of an offset from the board center or a pattern
+# center; index 0 is the identity. INVERSE[s] undoes symmetry s.
+SYMMETRIES = [
+    lambda dr, dc: (dr, dc),
+    lambda dr, dc: (dc, -dr),
+    lambda dr, dc: (-dr, -dc),
+    lambda dr, dc: (-dc, dr),
+    lambda dr, dc: (dr, -dc),
+    lambda dr, dc: (-dr, dc),
+    lambda dr, dc: (dc, dr),
+    lambda dr, dc: (-dc, -dr),
+]
+INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+PATTERN_RADIUS = 2
+PATTERN_OFFSETS = [(dr, dc) for dr in range(-PATTERN_RADIUS, PATTERN_RADIUS + 1)
+                   for dc in range(-PATTERN_RADIUS, PATTERN_RADIUS + 1) if (dr, dc) != (0, 0)]
+EMPTY, OWN, OTHER, OFF_BOARD = 0, 1, 2, 3
+
+
+def transform(point, size, symmetry):
+    # Doubled coordinates keep the center of even-sized boards on integers
+    row, col = point
+    dr, dc = SYMMETRIES[symmetry](2 * row - (size - 1), 2 * col - (size - 1))
+    return (dr + size - 1) // 2, (dc + size - 1) // 2
+
+
+@functools.lru_cache(maxsize=None)
+def symmetric_zobrist(size):
+    # keys[s][color][point] is the Zobrist key of point after applying symmetry s
+    table = zobrist_table(size)
+    return [{color: {point: table[color][transform(point, size, s)] for point in table[color]}
+             for color in table} for s in range(8)]
+
+
+def symmetric_hashes(goban):
+    keys = symmetric_zobrist(goban.size)
+    hashes = [0] * 8
+    for point, chain in goban.chains.items():
+        for s in range(8):
+            hashes[s] ^= keys[s][chain.color][point]
+    return hashes
+
+
+def canonical(goban):
+    # (hash, symmetry): the smallest of the 8 symmetric hashes and the symmetry that gives it
+    hashes = symmetric_hashes(goban)
+    best = min(range(8), key=hashes.__getitem__)
+    return hashes[best], best
+
+
+def canonical_hash(goban):
+    return canonical(goban)[0]
+
+
+class SymmetricHasher:
+    # Keeps the 8 symmetric hashes of a game in step with its moves, from the Move deltas
+    def __init__(self, goban):
+        self.keys = symmetric_zobrist(goban.size)
+        self.hashes = symmetric_hashes(goban)
+
+    def update(self, move):
+        if move.row is None:
+            return
+        opponent = 'W' if move.player == 'B' else 'B'
+        for s in range(8):
+            keys = self.keys[s]
+            h = self.hashes[s] ^ keys[move.player][(move.row, move.col)]
+            for point in move.captured:
+                h ^= keys[opponent][point]
+            self.hashes[s] = h
+
+    def canonical(self):
+        return min(self.hashes)
+
+
+@functools.lru_cache(maxsize=None)
+def pattern_keys():
+    rng = random.Random('pattern')
+    return [[rng.getrandbits(64) for _ in range(4)] for _ in PATTERN_OFFSETS]
+
+
+@functools.lru_cache(maxsize=None)
+def pattern_orders():
+    # For each symmetry, which of PATTERN_OFFSETS is read into each position of the pattern
+    return [[PATTERN_OFFSETS.index(SYMMETRIES[s](dr, dc)) for dr, dc in PATTERN_OFFSETS] for s in range(8)]
+
+
+def pattern_hash(goban, row, col, color):
+    # Symmetry-canonical hash of the 5x5 window around (row, col), with stones coded as
+    # own/other relative to color so a shape matches whichever side played it
+    board = goban.board
+    size = goban.size
+    codes = []
+    for dr, dc in PATTERN_OFFSETS:
+        r, c = row + dr, col + dc
+        if 0 <= r < size and 0 <= c < size:
+            value = board[r][c]
+            codes.append(EMPTY if value == ' ' else OWN if value == color else OTHER)
+        else:
+            codes.append(OFF_BOARD)
+
+    keys = pattern_keys()
+    best = None
+    for order in pattern_orders():
+        h = 0
+        for i, j in enumerate(order):
+            h ^= keys[i][codes[j]]
+        if best is None or h < best:
+            best = h
+    return best
@@ -0,0 +1,292 @@
+import argparse
+import collections
+import time
+
+LADDER_DEPTH = 200  # plies; enough for a ladder across a 19x19 board and back
+NET_DEPTH = 8
+MAX_REGION = 6  # empty points a group's eye space may have for status() to read it out
+MISSING = object()  # not in the transposition table
+NO_ESCAPE = object()  # escape_move's answer when nothing saves the chain
+
+
+class TranspositionTable:
+    # Reading results keyed by position hash, side to move, ko point and query, with
+    # least-recently-used entries dropped once capacity is reached
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def play(goban, point):
+    # A legal move for the side to move; superko is ignored, as tactical reading usually does
+    if point is None:
+        goban.play(None, None)
+        return True
+    if not goban.is_valid_move(*point) or goban.is_suicide(*point):
+        return False
+    goban.play(*point)
+    return True
+
+
+def take_back(goban):
+    goban.undo_move()
+    goban.redo_stack.pop()  # leave the caller's redo line as it was
+
+
+class TacticalReader:
+    # Ladders, nets and small life-and-death problems read out on the Goban itself with
+    # play/undo. Every answer is memoized, so asking again about a position costs a lookup.
+    def __init__(self, capacity=100000):
+        self.table = TranspositionTable(capacity)
+
+    def key(self, goban, *query):
+        return query + (goban.position_hash, goban.current_player, goban.ko_point)
+
+    def liberties(self, goban, point):
+        chain = goban.chains.get(point)
+        return chain.liberties if chain is not None else ()
+
+    def captured(self, goban, point, color):
+        chain = goban.chains.get(point)
+        return chain is None or chain.color != color
+
+    def attack(self, goban, point, depth, net):
+        # Side to move attacks the chain at point: a move that captures it, or None
+        key = self.key(goban, 'attack', point, depth, net)
+        result = self.table.get(key)
+        if result is not MISSING:
+            return result
+
+        color = goban.chains[point].color
+        liberties = sorted(self.liberties(goban, point))
+        result = None
+        if len(liberties) == 1:
+            if play(goban, liberties[0]):
+                take_back(goban)
+                result = liberties[0]
+        elif len(liberties) == 2 and depth > 0:
+            candidates = liberties
+            if net:  # also the points that close the net one step further out
+                candidates = liberties + sorted({n for lib in liberties for n in goban.neighbors[lib]
+                                                 if goban.board[n[0]][n[1]] == ' ' and n not in liberties})
+            for move in candidates:
+                if not play(goban, move):
+                    continue
+                escaped = self.defend(goban, point, color, depth - 1, net)
+                take_back(goban)
+                if not escaped:
+                    result = move
+                    break
+        return self.table.put(key, result)
+
+    def defend(self, goban, point, color, depth, net):
+        # Side to move owns the chain at point: True if it survives
+        if self.captured(goban, point, color):
+            return False
+        liberties = self.liberties(goban, point)
+        if len(liberties) >= 3 or depth == 0:
+            return True
+        return self.escape_move(goban, point, depth, net) is not NO_ESCAPE
+
+    def escape_move(self, goban, point, depth, net):
+        # A saving move for the chain at point (None if it is already safe), or NO_ESCAPE
+        key = self.key(goban, 'defend', point, depth, net)
+        result = self.table.get(key)
+        if result is not MISSING:
+            return result
+
+        chain = goban.chains[point]
+        color = chain.color
+        if len(chain.liberties) == 2:
+            goban.play(None, None)
+            capturable = self.attack(goban, point, depth - 1, net) is not None
+            take_back(goban)
+            if not capturable:
+                return self.table.put(key, None)  # safe even if the attacker moves twice
+            chain = goban.chains[point]  # reading rebuilds chains; the old object may be stale
+        candidates = set(chain.liberties)
+        for stone in chain.stones:
+            for n in goban.neighbors[stone]:
+                other = goban.chains.get(n)
+                if other is not None and other.color != color and len(other.liberties) == 1:
+                    candidates |= other.liberties  # capture an attacker chain in atari
+        for move in sorted(candidates):
+            if not play(goban, move):
+                continue
+            safe = not self.captured(goban, point, color) and \
+                (len(self.liberties(goban, point)) >= 3 or self.attack(goban, point, depth - 1, net) is None)
+            take_back(goban)
+            if safe:
+                return self.table.put(key, move)
+        return self.table.put(key, NO_ESCAPE)
+
+    def ladder(self, goban, row, col):
+        # Move for the side to move that captures the enemy chain at (row, col) in a ladder, or None
+        chain = goban.chains.get((row, col))
+        if chain is None or chain.color == goban.current_player:
+            return None
+        return self.attack(goban, (row, col), LADDER_DEPTH, False)
+
+    def net(self, goban, row, col):
+        # As ladder(), also trying the loose nets around the chain's liberties
+        chain = goban.chains.get((row, col))
+        if chain is None or chain.color == goban.current_player:
+            return None
+        return self.attack(goban, (row, col), NET_DEPTH, True)
+
+    def escape(self, goban, row, col):
+        # Move that saves the side to move's chain at (row, col) from a ladder or net, or
+        # None when none does (or none is needed: check liberties first)
+        chain = goban.chains.get((row, col))
+        if chain is None or chain.color != goban.current_player:
+            return None
+        move = self.escape_move(goban, (row, col), LADDER_DEPTH, False)
+        return None if move is NO_ESCAPE else move
+
+    def region(self, goban, point, max_empty):
+        # Eye space of the group at point: empty points and friendly stones reachable from
+        # it, plus enemy chains held entirely inside. None when it has more than max_empty empties.
+        color = goban.chains[point].color
+        region = {point}
+        frontier = [point]
+        empties = 0
+        while frontier:
+            for n in goban.neighbors[frontier.pop()]:
+                if n in region:
+                    continue
+                value = goban.board[n[0]][n[1]]
+                if value == ' ' or value == color:
+                    region.add(n)
+                    frontier.append(n)
+                    if value == ' ':
+                        empties += 1
+                        if empties > max_empty:
+                            return None
+        for n in list(region):
+            for m in goban.neighbors[n]:
+                chain = goban.chains.get(m)
+                if chain is not None and chain.color != color and chain.liberties <= region:
+                    region.update(chain.stones)
+        return frozenset(region)
+
+    def kill(self, goban, point, color, region, depth):
+        # Attacker to move: True if it can capture the chain at point playing inside region
+        if self.captured(goban, point, color):
+            return True
+        if depth == 0:
+            return False
+        key = self.key(goban, 'kill', point, region, depth)
+        result = self.table.get(key)
+        if result is not MISSING:
+            return result
+        result = False
+        for move in sorted(region):
+            if goban.board[move[0]][move[1]] != ' ' or not play(goban, move):
+                continue
+            lives = self.live(goban, point, color, region, depth - 1)
+            take_back(goban)
+            if not lives:
+                result = True
+                break
+        return self.table.put(key, result)
+
+    def live(self, goban, point, color, region, depth):
+        # Defender to move: True if the chain at point survives, passing or playing inside region
+        if self.captured(goban, point, color):
+            return False
+        if depth == 0:
+            return True
+        key = self.key(goban, 'live', point, region, depth)
+        result = self.table.get(key)
+        if result is not MISSING:
+            return result
+        result = False
+        for move in [None] + sorted(region):
+            if move is not None and goban.board[move[0]][move[1]] != ' ':
+                continue
+            if not play(goban, move):
+                continue
+            killed = self.kill(goban, point, color, region, depth - 1)
+            take_back(goban)
+            if not killed:
+                result = True
+                break
+        return self.table.put(key, result)
+
+    def status(self, goban, row, col, max_empty=MAX_REGION):
+        # 'alive', 'dead' or 'unsettled' for the group at (row, col) whichever side moves
+        # first; None when its eye space is too large to read out
+        point = (row, col)
+        chain = goban.chains.get(point)
+        if chain is None:
+            return None
+        region = self.region(goban, point, max_empty)
+        if region is None:
+            return None
+        depth = 2 * len(region) + 2
+        color = chain.color
+        to_move = goban.current_player
+        ko_point = goban.ko_point
+        try:
+            goban.current_player = 'W' if color == 'B' else 'B'
+            goban.ko_point = None
+            killable = self.kill(goban, point, color, region, depth)
+            goban.current_player = color
+            lives = self.live(goban, point, color, region, depth)
+        finally:
+            goban.current_player = to_move
+            goban.ko_point = ko_point
+        if not killable:
+            return 'alive'
+        return 'unsettled' if lives else 'dead'
+
+
+def main():
+    from goban_sgf import load
+
+    parser = argparse.ArgumentParser(description='Read ladders and life and death in an SGF position')
+    parser.add_argument('sgf')
+    parser.add_argument('--capacity', type=int, default=100000)
+    args = parser.parse_args()
+
+    goban = load(args.sgf)
+    reader = TacticalReader(args.capacity)
+    seen = set()
+    for point, chain in sorted(goban.chains.items()):
+        if id(chain) in seen:
+            continue
+        seen.add(id(chain))
+        start = time.perf_counter()
+        if chain.color == goban.current_player:
+            result = f'escape {reader.escape(goban, *point)}' if len(chain.liberties) == 1 else ''
+        else:
+            result = f'ladder {reader.ladder(goban, *point)}' if len(chain.liberties) <= 2 else ''
+        result += f' {reader.status(goban, *point)}'
+        elapsed = time.perf_counter() - start
+        print(f'{chain.color} {point} {len(chain.liberties)} libs: {result.strip()} ({elapsed * 1e6:.0f} us)')
+    print(f'{len(reader.table)} entries, {reader.table.hits} hits, {reader.table.misses} misses')
+
+
+if __name__ == "__main__":
+    main()
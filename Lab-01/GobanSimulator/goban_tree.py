@@ -0,0 +1,107 @@
+class VariationNode:
+    # A move in the game tree. Nodes hold only the Move delta that leads to them from their
+    # parent, so every variation shares the moves of its common prefix.
+    __slots__ = ('move', 'parent', 'children', 'current_child', 'depth')
+
+    def __init__(self, move, parent):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.current_child = None  # the branch Redo follows: the one visited last
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def child(self, row, col, player):
+        for child in self.children:
+            if (child.move.row, child.move.col, child.move.player) == (row, col, player):
+                return child
+        return None
+
+
+class GameTree:
+    # Review history for a Goban: playing after an undo adds a variation instead of
+    # dropping the redo line. The Goban always holds the position of self.node.
+    def __init__(self, goban):
+        self.goban = goban
+        self.root = VariationNode(None, None)
+        self.node = self.root
+        for move in goban.move_history:  # adopt a game already on the board as the main line
+            self.add(move)
+        goban.redo_stack.clear()
+
+    def add(self, move):
+        child = self.node.child(move.row, move.col, move.player)
+        if child is None:
+            child = VariationNode(move, self.node)
+            self.node.children.append(child)
+        self.node.current_child = child
+        self.node = child
+        return child
+
+    def play(self, row, col):
+        if not self.goban.place_stone(row, col):
+            return False
+        self.add(self.goban.move_history[-1])
+        return True
+
+    def pass_move(self):
+        self.goban.pass_move()
+        self.add(self.goban.move_history[-1])
+        return True
+
+    def back(self):
+        if self.node.parent is None:
+            return False
+        self.goban.undo_move()
+        self.goban.redo_stack.clear()
+        self.node = self.node.parent
+        return True
+
+    def forward(self, child=None):
+        child = child or self.node.current_child
+        if child is None:
+            return False
+        self.goban.redo_stack.append(child.move)
+        self.goban.redo_move()
+        self.node.current_child = child
+        self.node = child
+        return True
+
+    def goto(self, target):
+        # Undo up to the common ancestor, then replay down to target, so the cost is the
+        # length of the path between the two nodes rather than of the whole game
+        path = []
+        node = target
+        while node.depth > self.node.depth:
+            path.append(node)
+            node = node.parent
+        while self.node.depth > node.depth:
+            self.back()
+        while self.node is not node:
+            self.back()
+            path.append(node)
+            node = node.parent
+        for child in reversed(path):
+            self.forward(child)
+
+    def variations(self):
+        # (index of the current node among its siblings, number of siblings)
+        if self.node.parent is None:
+            return 0, 1
+        siblings = self.node.parent.children
+        return siblings.index(self.node), len(siblings)
+
+    def switch_branch(self, step):
+        # Move to the next (step 1) or previous (step -1) variation at the current move
+        if self.node.parent is None:
+            return False
+        siblings = self.node.parent.children
+        if len(siblings) < 2:
+            return False
+        target = siblings[(siblings.index(self.node) + step) % len(siblings)]
+        self.back()
+        return self.forward(target)
+
+    def reset(self):
+        self.goban.new_game()
+        self.root = VariationNode(None, None)
+        self.node = self.root
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from goban_server import GameClient, GobanServer
+
+
+@pytest.fixture
+def server():
+    # A GobanServer on a loopback ephemeral port, run by its own event loop thread
+    loop = asyncio.new_event_loop()
+    instance = GobanServer()
+    listener = loop.run_until_complete(instance.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield instance
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    listener.close()
+    loop.run_until_complete(listener.wait_closed())
+    loop.close()
+
+
+@pytest.fixture
+def connect(server):
+    clients = []
+
+    def connect():
+        client = GameClient('127.0.0.1', server.port)
+        clients.append(client)
+        return client
+
+    yield connect
+    for client in clients:
+        client.close()
+
+
+def settle(*clients, until, timeout=2.0):
+    # Apply what the server sends until until() holds
+    deadline = time.monotonic() + timeout
+    while not until():
+        assert time.monotonic() < deadline, 'timed out'
+        for client in clients:
+            client.receive(0.01)
+            client.poll()
+
+
+def last_point(client):
+    history = client.goban.move_history
+    return (history[-1].row, history[-1].col) if history else None
+
+
+def play(player, row, col, *clients):
+    # player moves; waits until every client has applied it
+    player.play(row, col)
+    settle(*clients, until=lambda: all(last_point(client) == (row, col) for client in clients))
+
+
+def test_create_and_join(connect):
+    black, white = connect(), connect()
+    goban = black.create(size=9, colors=['B'])
+    assert goban.size == 9 and black.colors == ['B']
+    white.join(black.game)
+    assert white.game == black.game and white.colors == ['W']
+    watcher = connect()
+    watcher.join(black.game)
+    assert watcher.colors == []
+
+
+def test_join_missing_game(connect):
+    with pytest.raises(ValueError, match='no such game'):
+        connect().join(12345)
+
+
+def test_not_your_turn(connect):
+    black, white = connect(), connect()
+    black.create(size=9, colors=['B'])
+    white.join(black.game)
+    white.play(4, 4)
+    settle(white, until=lambda: white.errors)
+    assert white.errors == ['not your turn']
+    assert not black.goban.move_history and not white.goban.move_history
+
+
+def test_illegal_move(connect):
+    black, white = connect(), connect()
+    black.create(size=9, colors=['B'])
+    white.join(black.game)
+    play(black, 4, 4, black, white)
+    white.play(4, 4)
+    settle(white, until=lambda: white.errors)
+    assert white.errors == ['illegal move']
+    white.play(9, 9)
+    settle(white, until=lambda: len(white.errors) == 2)
+    assert len(black.goban.move_history) == len(white.goban.move_history) == 1
+
+
+def test_capture_delta(connect):
+    black, white = connect(), connect()
+    black.create(size=9, colors=['B'])
+    white.join(black.game)
+    for player, (row, col) in zip([black, white] * 3, [(0, 1), (0, 0), (5, 5), (6, 6), (1, 0)]):
+        play(player, row, col, black, white)
+    for client in (black, white):
+        assert client.goban.move_history[-1].captured == ((0, 0),)
+        assert client.goban.board[0][0] == ' '
+        assert not client.errors
+
+
+def test_undo_stays_in_sync(connect):
+    black, white = connect(), connect()
+    black.create(size=9, colors=['B'])
+    white.join(black.game)
+    for player, (row, col) in zip([black, white] * 2, [(2, 2), (6, 6), (2, 6), (6, 2)]):
+        play(player, row, col, black, white)
+    black.undo()
+    settle(black, white, until=lambda: len(black.goban.move_history) == len(white.goban.move_history) == 3)
+    play(white, 4, 4, black, white)
+    assert black.goban.board == white.goban.board
+    assert black.goban.position_hash == white.goban.position_hash
+    assert not black.errors and not white.errors
+
+
+def test_late_joiner_gets_every_move(connect):
+    black, white = connect(), connect()
+    black.create(size=9, colors=['B'])
+    white.join(black.game)
+    for player, (row, col) in zip([black, white] * 3, [(0, 1), (0, 0), (3, 3), (7, 7), (1, 0), (5, 5)]):
+        play(player, row, col, black)
+    late = connect()
+    late.join(black.game)
+    assert late.goban.move_history == black.goban.move_history
+    assert late.goban.board == black.goban.board
+    assert not late.errors
+
+
+def test_non_object_message(connect):
+    # Valid JSON that is not an object gets an error reply and the connection stays up
+    client = connect()
+    client.sock.sendall(b'[1]\n5\n')
+    settle(client, until=lambda: len(client.errors) == 2)
+    assert client.errors == ['expected a JSON object'] * 2
+    assert client.create(size=9).size == 9
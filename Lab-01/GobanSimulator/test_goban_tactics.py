@@ -0,0 +1,27 @@
+from goban import Goban
+from goban_tactics import TacticalReader
+
+
+def position(size, stones, to_move):
+    goban = Goban(size)
+    goban.place_setup_stones(stones)
+    goban.current_player = to_move
+    return goban
+
+
+def test_escape_reads_chains_after_probing():
+    # The probe for a two-liberty chain rebuilds chains; the candidates must come from the live one
+    goban = position(9, [(4, 4, 'W'), (3, 4, 'B'), (4, 3, 'B'), (5, 5, 'B')], 'W')
+    assert TacticalReader().escape(goban, 4, 4) == (4, 5)
+
+
+def test_no_escape_is_cached():
+    # A stone caught in an edge ladder: no escape, and asking again is a table hit
+    goban = position(9, [(0, 0, 'W'), (0, 1, 'B')], 'W')
+    reader = TacticalReader()
+    assert reader.escape(goban, 0, 0) is None
+    misses = reader.table.misses
+    hits = reader.table.hits
+    assert reader.escape(goban, 0, 0) is None
+    assert reader.table.misses == misses
+    assert reader.table.hits == hits + 1
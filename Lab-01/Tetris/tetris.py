@@ -1,13 +1,13 @@
+import argparse
+
 import pygame
-import random
 
-# Initialize Pygame
-pygame.init()
+from tetris_core import HEIGHT, LEFT, NOOP, RIGHT, ROTATE, ROTATIONS, SOFT_DROP, WIDTH, TetrisGame
 
 # Screen dimensions
-SCREEN_WIDTH = 300
-SCREEN_HEIGHT = 900  # Increased height for easier gameplay
 BLOCK_SIZE = 30
+SCREEN_WIDTH = WIDTH * BLOCK_SIZE
+SCREEN_HEIGHT = HEIGHT * BLOCK_SIZE  # Increased height for easier gameplay
 
 # Colors
 BLACK = (0, 0, 0)
@@ -20,112 +20,38 @@ MAGENTA = (255, 0, 255)
 YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 
-# Shapes
-SHAPES = [
-    [[1, 1, 1], [0, 1, 0]],  # T
-    [[1, 1, 1, 1]],          # I
-    [[1, 1], [1, 1]],        # O
-    [[0, 1, 1], [1, 1, 0]],  # S
-    [[1, 1, 0], [0, 1, 1]],  # Z
-    [[1, 1, 1], [1, 0, 0]],  # L
-    [[1, 1, 1], [0, 0, 1]]   # J
-]
-
-# Colors for shapes
+# Colors for shapes, indexed by the game's color numbers
 SHAPE_COLORS = [CYAN, BLUE, ORANGE, YELLOW, GREEN, MAGENTA, RED]
 
+KEY_ACTIONS = {pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT, pygame.K_DOWN: SOFT_DROP, pygame.K_UP: ROTATE}
+
 class Tetris:
-    def __init__(self, screen):
+    # Draws a TetrisGame; the rules all live in tetris_core
+    def __init__(self, screen, game=None):
         self.screen = screen
-        self.grid = [[BLACK for _ in range(SCREEN_WIDTH // BLOCK_SIZE)] for _ in range(SCREEN_HEIGHT // BLOCK_SIZE)]
-        self.current_shape = self.get_new_shape()
-        self.next_shape = self.get_new_shape()  # Next shape
-        self.current_shape_color = random.choice(SHAPE_COLORS)
-        self.next_shape_color = random.choice(SHAPE_COLORS)  # Next shape color
-        self.shape_x = SCREEN_WIDTH // BLOCK_SIZE // 2 - len(self.current_shape[0]) // 2
-        self.shape_y = 0
-        self.fall_time = 0
-        self.score = 0
+        self.game = game or TetrisGame()
         self.font = pygame.font.SysFont('comicsans', 30)
 
-    def get_new_shape(self):
-        return random.choice(SHAPES)
+    def draw_block(self, color, x, y):
+        pygame.draw.rect(self.screen, color, (x, y, BLOCK_SIZE, BLOCK_SIZE), 0)
+        pygame.draw.rect(self.screen, WHITE, (x, y, BLOCK_SIZE, BLOCK_SIZE), 1)
 
     def draw_grid(self):
-        for y in range(len(self.grid)):
-            for x in range(len(self.grid[y])):
-                pygame.draw.rect(self.screen, self.grid[y][x], (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 0)
-                pygame.draw.rect(self.screen, WHITE, (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 1)
+        game = self.game
+        for y in range(game.height):
+            for x in range(game.width):
+                index = game.colors[y * game.width + x]
+                self.draw_block(SHAPE_COLORS[index - 1] if index else BLACK, x * BLOCK_SIZE, y * BLOCK_SIZE)
 
     def draw_shape(self):
-        for y, row in enumerate(self.current_shape):
-            for x, val in enumerate(row):
-                if val == 1:
-                    pygame.draw.rect(self.screen, self.current_shape_color,
-                                     ((self.shape_x + x) * BLOCK_SIZE, (self.shape_y + y) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 0)
-                    pygame.draw.rect(self.screen, WHITE,
-                                     ((self.shape_x + x) * BLOCK_SIZE, (self.shape_y + y) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 1)
+        game = self.game
+        for x, y in game.state().cells:
+            self.draw_block(SHAPE_COLORS[game.current_color], (game.shape_x + x) * BLOCK_SIZE, (game.shape_y + y) * BLOCK_SIZE)
 
     def draw_next_shape(self):
-        for y, row in enumerate(self.next_shape):
-            for x, val in enumerate(row):
-                if val == 1:
-                    pygame.draw.rect(self.screen, self.next_shape_color,
-                                     (SCREEN_WIDTH + 20 + x * BLOCK_SIZE, 50 + 40 + y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 0)
-                    pygame.draw.rect(self.screen, WHITE,
-                                     (SCREEN_WIDTH + 20 + x * BLOCK_SIZE, 50 + 40 + y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 1)
-
-    def valid_space(self):
-        for y, row in enumerate(self.current_shape):
-            for x, val in enumerate(row):
-                if val == 1:
-                    if (self.shape_y + y >= len(self.grid) or
-                            self.shape_x + x >= len(self.grid[0]) or
-                            self.shape_x + x < 0 or
-                            self.grid[self.shape_y + y][self.shape_x + x] != BLACK):
-                        return False
-        return True
-
-    def lock_shape(self):
-        for y, row in enumerate(self.current_shape):
-            for x, val in enumerate(row):
-                if val == 1:
-                    self.grid[self.shape_y + y][self.shape_x + x] = self.current_shape_color
-        self.current_shape = self.next_shape  # Move next shape to current
-        self.current_shape_color = self.next_shape_color  # Move next shape color to current
-        self.next_shape = self.get_new_shape()  # Generate new next shape
-        self.next_shape_color = random.choice(SHAPE_COLORS)  # Generate new next shape color
-        self.shape_x = SCREEN_WIDTH // BLOCK_SIZE // 2 - len(self.current_shape[0]) // 2
-        self.shape_y = 0
-        if not self.valid_space():
-            self.__init__(self.screen)
-
-    def clear_rows(self):
-        new_grid = [row for row in self.grid if BLACK in row]
-        cleared_rows = len(self.grid) - len(new_grid)
-        self.score += cleared_rows * 10  # Add score
-        new_grid = [[BLACK for _ in range(SCREEN_WIDTH // BLOCK_SIZE)] for _ in range(cleared_rows)] + new_grid
-        self.grid = new_grid
-
-    def rotate_shape(self):
-        self.current_shape = [list(row) for row in zip(*self.current_shape[::-1])]
-        if not self.valid_space():
-            self.current_shape = [list(row) for row in zip(*self.current_shape[::-1])][::-1]
-
-    def move_shape(self, dx):
-        self.shape_x += dx
-        if not self.valid_space():
-            self.shape_x -= dx
-
-    def update(self):
-        self.fall_time += 1
-        if self.fall_time >= 10:  # Slower falling speed
-            self.shape_y += 1
-            if not self.valid_space():
-                self.shape_y -= 1
-                self.lock_shape()
-                self.clear_rows()
-            self.fall_time = 0
+        game = self.game
+        for x, y in ROTATIONS[game.next_shape][0].cells:
+            self.draw_block(SHAPE_COLORS[game.next_color], SCREEN_WIDTH + 20 + x * BLOCK_SIZE, 50 + 40 + y * BLOCK_SIZE)
 
     def draw(self):
         self.screen.fill(BLACK)
@@ -136,39 +62,40 @@ class Tetris:
         pygame.display.update()
 
     def draw_score(self):
-        score_text = self.font.render(f'Score: {self.score}', True, WHITE)
+        score_text = self.font.render(f'Score: {self.game.score}', True, WHITE)
         self.screen.blit(score_text, (SCREEN_WIDTH + 20, 10))
 
 def main():
+    parser = argparse.ArgumentParser(description='Tetris')
+    parser.add_argument('--autoplay', action='store_true', help='let the placement AI play')
+    parser.add_argument('--no-lookahead', action='store_true', help='the AI ignores the next shape')
+    args = parser.parse_args()
+
+    pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH + 150, SCREEN_HEIGHT))  # Extra width for next shape hint
     pygame.display.set_caption("Tetris")
     clock = pygame.time.Clock()
-    game = Tetris(screen)
+    view = Tetris(screen)
+    player = None
+    if args.autoplay:
+        from tetris_ai import AutoPlayer  # needs numpy; manual play does not
+
+        player = AutoPlayer(not args.no_lookahead)
 
     running = True
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    game.move_shape(-1)
-                if event.key == pygame.K_RIGHT:
-                    game.move_shape(1)
-                if event.key == pygame.K_DOWN:
-                    game.shape_y += 1
-                    if not game.valid_space():
-                        game.shape_y -= 1
-                        game.lock_shape()
-                        game.clear_rows()
-                if event.key == pygame.K_UP:
-                    game.rotate_shape()
-
-        game.update()
-        game.draw()
+            if event.type == pygame.KEYDOWN and event.key in KEY_ACTIONS:
+                view.game.act(KEY_ACTIONS[event.key])
+
+        if view.game.step(player.action(view.game) if player else NOOP)[1]:
+            view.game = TetrisGame()  # start over, as the game always has
+        view.draw()
         clock.tick(30)
 
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import functools
+import time
+
+import numpy as np
+
+from tetris_core import HARD_DROP, LEFT, NOOP, RIGHT, ROTATE, ROTATIONS, WIDTH, TetrisGame, collides, spawn_x
+
+# Weights of the classic hand-tuned evaluator: aggregate height, lines cleared, holes, bumpiness
+WEIGHTS = np.array([-0.510066, 0.760666, -0.35663, -0.184483])
+CACHE_SIZE = 1 << 16
+MAX_ACTIONS = 10  # per piece in autoplay before the piece is dropped wherever it is
+
+
+def land(rows, state, x, width):
+    # Row the piece's box comes to rest at when dropped at column x: it falls freely until
+    # it reaches the highest filled row, then one row at a time
+    top = next((y for y, row in enumerate(rows) if row), len(rows))
+    y = max(0, top - state.top - state.height)
+    while not collides(rows, state, x, y + 1, width):
+        y += 1
+    return y
+
+
+def lock(rows, state, x, y, width):
+    # The board after the piece locks at (x, y) and full rows clear, and the rows cleared
+    rows = list(rows)
+    for dy, mask in enumerate(state.masks, y + state.top):
+        rows[dy] |= mask << (x + state.left)
+    full_row = (1 << width) - 1
+    kept = [row for row in rows if row != full_row]
+    cleared = len(rows) - len(kept)
+    return (0,) * cleared + tuple(kept), cleared
+
+
+def placements(rows, shape, width=WIDTH):
+    # Every final position of shape reachable by rotating at the spawn point, sliding along
+    # the top row and dropping: [(rotation, x, board after, rows cleared)], one per distinct board
+    results = []
+    seen = set()
+    start = spawn_x(shape, width)
+    for rotation, state in enumerate(ROTATIONS[shape]):
+        if collides(rows, state, start, 0, width):
+            continue
+        for step in (-1, 1):
+            x = start if step < 0 else start + 1
+            while not collides(rows, state, x, 0, width):
+                board, cleared = lock(rows, state, x, land(rows, state, x, width), width)
+                if board not in seen:
+                    seen.add(board)
+                    results.append((rotation, x, board, cleared))
+                x += step
+    return results
+
+
+def features(boards, width=WIDTH):
+    # (K, 3) aggregate height, holes and bumpiness of K boards given as an (K, height) array
+    filled = (boards[:, :, None] >> np.arange(width)) & 1 > 0
+    height = boards.shape[1]
+    heights = np.where(filled.any(axis=1), height - filled.argmax(axis=1), 0)
+    holes = (np.maximum.accumulate(filled, axis=1) & ~filled).sum(axis=(1, 2))
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+    return np.stack([heights.sum(axis=1), holes, bumpiness], axis=1)
+
+
+def evaluate(boards, cleared, width=WIDTH):
+    # Scores of K candidate boards in one vectorized pass
+    height, holes, bumpiness = features(np.array(boards, np.int64), width).T
+    return WEIGHTS @ np.stack([height, np.asarray(cleared), holes, bumpiness])
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def best_placement(rows, shape, next_shape=None, width=WIDTH):
+    # (rotation, x) of the best placement of shape on the board rows (a tuple of row
+    # bitmasks), looking one piece ahead when next_shape is given; None when nothing fits.
+    # Memoized on the arguments, so a board seen again costs a lookup.
+    candidates = placements(rows, shape, width)
+    if not candidates:
+        return None
+    scores = evaluate([board for _, _, board, _ in candidates], [cleared for *_, cleared in candidates], width)
+    if next_shape is not None:
+        # All second placements of every candidate scored together; a candidate after which
+        # the next piece cannot be placed keeps only its own score, minus the worst possible
+        owners = []
+        boards = []
+        cleared = []
+        for index, (_, _, board, lines) in enumerate(candidates):
+            for _, _, after, more in placements(board, next_shape, width):
+                owners.append(index)
+                boards.append(after)
+                cleared.append(lines + more)
+        if boards:
+            ahead = np.full(len(candidates), -np.inf)
+            np.maximum.at(ahead, owners, evaluate(boards, cleared, width))
+            scores = np.where(np.isinf(ahead), scores - np.abs(scores).max() - 1e6, ahead)
+    rotation, x, _, _ = candidates[int(np.argmax(scores))]
+    return rotation, x
+
+
+def choose(game, lookahead=True):
+    return best_placement(tuple(game.rows), game.current_shape, game.next_shape if lookahead else None,
+                          game.width)
+
+
+class AutoPlayer:
+    # Turns the chosen placement into key presses for a TetrisGame, one action per call:
+    # rotate, slide, then hard drop
+    def __init__(self, lookahead=True):
+        self.lookahead = lookahead
+        self.piece = None
+        self.target = None
+        self.actions = 0
+
+    def action(self, game):
+        if self.piece != game.pieces:
+            self.piece = game.pieces
+            self.target = choose(game, self.lookahead)
+            self.actions = 0
+        if self.target is None:
+            return NOOP
+        self.actions += 1
+        rotation, x = self.target
+        if self.actions > MAX_ACTIONS:
+            return HARD_DROP
+        if game.rotation != rotation:
+            return ROTATE
+        if game.shape_x != x:
+            return LEFT if game.shape_x > x else RIGHT
+        return HARD_DROP
+
+
+def play(seed, lookahead=True, max_pieces=None):
+    # One headless game placed directly by the AI; returns the finished TetrisGame
+    game = TetrisGame(seed=seed)
+    while not game.game_over and (max_pieces is None or game.pieces < max_pieces):
+        target = choose(game, lookahead)
+        if target is None:
+            break
+        game.place(*target)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Strength and speed baseline of the Tetris placement AI')
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--pieces', type=int, default=500, help='pieces per game at most')
+    parser.add_argument('--no-lookahead', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pieces = 0
+    start = time.perf_counter()
+    for seed in range(args.seed, args.seed + args.games):
+        game = play(seed, not args.no_lookahead, args.pieces)
+        pieces += game.pieces
+        print(f'seed {seed}: {game.pieces} pieces, {game.lines} lines, score {game.score}'
+              + (', game over' if game.game_over else ''))
+    elapsed = time.perf_counter() - start
+    info = best_placement.cache_info()
+    print(f'{pieces} pieces in {elapsed:.2f}s: {pieces / elapsed:.0f} placements/s, '
+          f'cache {info.hits} hits, {info.misses} misses')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import time
+
+import numpy as np
+
+from tetris_core import (FALL_FRAMES, HARD_DROP, HEIGHT, KICKS, LEFT, LINE_SCORE, RIGHT, ROTATE, ROTATE_CCW,
+                         ROTATIONS, SHAPES, SOFT_DROP, WIDTH, spawn_x)
+
+# N boards stepped together: every board is a row of an (N, height) array of row bitmasks,
+# and each rule of tetris_core.TetrisGame is applied to all boards at once with array ops.
+# Boards have no color plane; only occupancy matters to a learner.
+
+BOX = 4  # every rotation fits a 4x4 box
+TURNS = (1, -1)  # rotation directions, indexed as in KICK_TABLE
+
+
+def piece_tables():
+    # masks[shape, rotation, dy]: box row dy as a bitmask with bit 0 at the state's left
+    # column; bounds[shape, rotation]: left, top, width, height of the occupied cells
+    masks = np.zeros((len(SHAPES), 4, BOX), np.int32)
+    bounds = np.zeros((len(SHAPES), 4, 4), np.int32)
+    for shape, states in enumerate(ROTATIONS):
+        for rotation, state in enumerate(states):
+            masks[shape, rotation, state.top:state.top + state.height] = state.masks
+            bounds[shape, rotation] = state.left, state.top, state.width, state.height
+    return masks, bounds
+
+
+def kick_table():
+    # kicks[shape, rotation, turn, test] = (dx, dy); shorter kick lists repeat their last test
+    kicks = np.zeros((len(SHAPES), 4, len(TURNS), 5, 2), np.int32)
+    for shape, table in enumerate(KICKS):
+        for rotation in range(4):
+            for turn, step in enumerate(TURNS):
+                tests = table[(rotation, (rotation + step) % 4)]
+                kicks[shape, rotation, turn] = tests + tests[-1:] * (5 - len(tests))
+    return kicks
+
+
+MASKS, BOUNDS = piece_tables()
+KICK_TABLE = kick_table()
+
+
+class TetrisBatch:
+    def __init__(self, boards, width=WIDTH, height=HEIGHT, seed=None):
+        if width > 16:
+            raise ValueError('boards wider than 16 columns do not fit a uint16 row')
+        self.boards = boards
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rng = np.random.default_rng(seed)
+        self.spawn_x = np.array([spawn_x(shape, width) for shape in range(len(SHAPES))], np.int32)
+        self.rows = np.zeros((boards, height), np.uint16)
+        self.current_shape = np.zeros(boards, np.int32)
+        self.next_shape = np.zeros(boards, np.int32)
+        self.rotation = np.zeros(boards, np.int32)
+        self.shape_x = np.zeros(boards, np.int32)
+        self.shape_y = np.zeros(boards, np.int32)
+        self.fall_time = np.zeros(boards, np.int32)
+        self.score = np.zeros(boards, np.int64)
+        self.lines = np.zeros(boards, np.int64)
+        self.pieces = np.zeros(boards, np.int64)
+        self.game_over = np.zeros(boards, bool)
+        self.cleared = np.zeros(boards, np.int64)
+        self.reset()
+
+    def reset(self, boards=None):
+        # Start fresh games on the given boards (indices or a boolean mask), all by default
+        index = np.arange(self.boards) if boards is None else np.flatnonzero(boards) \
+            if np.asarray(boards).dtype == bool else np.asarray(boards)
+        self.rows[index] = 0
+        self.next_shape[index] = self.rng.integers(len(SHAPES), size=len(index))
+        self.score[index] = 0
+        self.lines[index] = 0
+        self.pieces[index] = 0
+        self.game_over[index] = False
+        self.spawn(index)
+
+    def spawn(self, index):
+        # Move each board's next shape into play; boards where it does not fit are over
+        self.current_shape[index] = self.next_shape[index]
+        self.next_shape[index] = self.rng.integers(len(SHAPES), size=len(index))
+        self.rotation[index] = 0
+        self.shape_x[index] = self.spawn_x[self.current_shape[index]]
+        self.shape_y[index] = 0
+        self.fall_time[index] = 0
+        self.game_over[index] |= self.collides(index, self.rotation[index], self.shape_x[index],
+                                               self.shape_y[index])
+
+    def collides(self, index, rotation, x, y):
+        # For each board in index: True if its piece at rotation with its box at (x, y) leaves
+        # the board or overlaps a filled cell
+        shape = self.current_shape[index]
+        left, top, width, height = BOUNDS[shape, rotation].T
+        x = x + left
+        outside = (x < 0) | (x + width > self.width) | (y + top < 0) | (y + top + height > self.height)
+        ys = np.clip(y[:, None] + np.arange(BOX), 0, self.height - 1)
+        cells = MASKS[shape, rotation] << np.clip(x, 0, self.width)[:, None]
+        return outside | (self.rows[index[:, None], ys] & cells).any(axis=1)
+
+    def move(self, index, dx):
+        x = self.shape_x[index] + dx
+        fits = ~self.collides(index, self.rotation[index], x, self.shape_y[index])
+        self.shape_x[index[fits]] = x[fits]
+
+    def rotate(self, index, turn):
+        # The first wall kick that fits wins, tried for all boards test by test
+        target = (self.rotation[index] + TURNS[turn]) % 4
+        kicks = KICK_TABLE[self.current_shape[index], self.rotation[index], turn]
+        pending = np.ones(len(index), bool)
+        for test in range(kicks.shape[1]):
+            x = self.shape_x[index] + kicks[:, test, 0]
+            y = self.shape_y[index] + kicks[:, test, 1]
+            fits = pending & ~self.collides(index, target, x, y)
+            moved = index[fits]
+            self.rotation[moved] = target[fits]
+            self.shape_x[moved] = x[fits]
+            self.shape_y[moved] = y[fits]
+            pending &= ~fits
+            if not pending.any():
+                break
+
+    def drop(self, index):
+        # One row down; boards whose piece cannot fall lock it
+        y = self.shape_y[index] + 1
+        stuck = self.collides(index, self.rotation[index], self.shape_x[index], y)
+        self.shape_y[index[~stuck]] = y[~stuck]
+        self.lock(index[stuck])
+
+    def hard_drop(self, index):
+        falling = index
+        while len(falling):
+            y = self.shape_y[falling] + 1
+            fits = ~self.collides(falling, self.rotation[falling], self.shape_x[falling], y)
+            falling = falling[fits]
+            self.shape_y[falling] += 1
+        self.lock(index)
+
+    def lock(self, index):
+        if not len(index):
+            return
+        shape = self.current_shape[index]
+        rotation = self.rotation[index]
+        left = BOUNDS[shape, rotation, 0]
+        ys = np.clip(self.shape_y[index, None] + np.arange(BOX), 0, self.height - 1)
+        cells = MASKS[shape, rotation] << (self.shape_x[index] + left)[:, None]
+        # bitwise_or.at because clipping can repeat a row index within a board
+        np.bitwise_or.at(self.rows, (np.repeat(index, BOX), ys.ravel()), cells.ravel().astype(np.uint16))
+        self.pieces[index] += 1
+        self.spawn(index)  # before clearing, as TetrisGame.lock_shape checks the spawn
+        self.clear_rows(index)
+
+    def clear_rows(self, index):
+        # Full rows sort to the top of each board and are zeroed, the rest keep their order
+        rows = self.rows[index]
+        full = rows == self.full_row
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            order = np.argsort(np.where(full, -1, np.arange(self.height)), axis=1, kind='stable')
+            rows = np.take_along_axis(rows, order, axis=1)
+            rows[np.arange(self.height) < cleared[:, None]] = 0
+            self.rows[index] = rows
+            self.score[index] += cleared * LINE_SCORE
+            self.lines[index] += cleared
+        self.cleared[index] += cleared
+
+    def step(self, actions):
+        # One frame on every board that is still playing: its action from the actions vector,
+        # then gravity every FALL_FRAMES frames. Returns (rows cleared, game over) per board.
+        actions = np.broadcast_to(np.asarray(actions), (self.boards,))
+        self.cleared = np.zeros(self.boards, np.int64)
+        playing = ~self.game_over
+        for action, apply in ((LEFT, lambda index: self.move(index, -1)),
+                              (RIGHT, lambda index: self.move(index, 1)),
+                              (ROTATE, lambda index: self.rotate(index, 0)),
+                              (ROTATE_CCW, lambda index: self.rotate(index, 1)),
+                              (SOFT_DROP, self.drop),
+                              (HARD_DROP, self.hard_drop)):
+            index = np.flatnonzero(playing & (actions == action))
+            if len(index):
+                apply(index)
+        falling = playing & ~self.game_over & (actions != HARD_DROP)
+        self.fall_time[falling] += 1
+        due = np.flatnonzero(falling & (self.fall_time >= FALL_FRAMES))
+        self.fall_time[due] = 0
+        self.drop(due)
+        return self.cleared, self.game_over.copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time batched Tetris with random actions')
+    parser.add_argument('--boards', type=int, nargs='+', default=[1, 16, 256, 4096])
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for boards in args.boards:
+        batch = TetrisBatch(boards, seed=args.seed)
+        rng = np.random.default_rng(args.seed)
+        actions = rng.integers(HARD_DROP + 1, size=(args.steps, boards))
+        pieces = 0
+        start = time.perf_counter()
+        for step in range(args.steps):
+            done = batch.step(actions[step])[1]
+            if done.any():
+                pieces += int(batch.pieces[done].sum())
+                batch.reset(done)
+        elapsed = time.perf_counter() - start
+        pieces += int(batch.pieces.sum())
+        print(f'{boards:6d} boards: {args.steps / elapsed:8.0f} steps/s, '
+              f'{boards * args.steps / elapsed:10.0f} board-steps/s, {pieces / elapsed:9.0f} pieces/s')
+
+
+if __name__ == "__main__":
+    main()
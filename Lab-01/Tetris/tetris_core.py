@@ -0,0 +1,270 @@
+import argparse
+import random
+import time
+from collections import namedtuple
+
+# Game rules and state without any display: the pygame window in tetris.py is a view of
+# TetrisGame, and simulations drive it directly through step()
+
+WIDTH = 10
+HEIGHT = 30
+FALL_FRAMES = 10  # frames between gravity steps
+LINE_SCORE = 10
+NUM_COLORS = 7
+
+# Shapes, in the spawn orientation and square box of the standard rotation system: flat
+# side down, and I on the second row of its 4x4 box
+SHAPES = [
+    [[0, 1, 0], [1, 1, 1], [0, 0, 0]],  # T
+    [[0, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0], [0, 0, 0, 0]],  # I
+    [[1, 1], [1, 1]],                   # O
+    [[0, 1, 1], [1, 1, 0], [0, 0, 0]],  # S
+    [[1, 1, 0], [0, 1, 1], [0, 0, 0]],  # Z
+    [[0, 0, 1], [1, 1, 1], [0, 0, 0]],  # L
+    [[1, 0, 0], [1, 1, 1], [0, 0, 0]]   # J
+]
+
+# Actions for step()
+NOOP, LEFT, RIGHT, ROTATE, ROTATE_CCW, SOFT_DROP, HARD_DROP = range(7)
+ACTIONS = [NOOP, LEFT, RIGHT, ROTATE, ROTATE_CCW, SOFT_DROP, HARD_DROP]
+
+# One rotation of a piece inside its square bounding box, as the standard rotation system
+# turns pieces: cells are (x, y) offsets in the box, and masks hold the occupied rows
+# top..top+height-1 as bitmasks with bit 0 at column left of the box
+PieceState = namedtuple('PieceState', ['cells', 'masks', 'left', 'top', 'width', 'height'])
+
+# Wall kicks of the standard rotation system, (dx, dy) with y pointing down, tried in
+# order for each (from, to) rotation; 0 is the spawn state and 1 is one turn clockwise
+JLSTZ_KICKS = {
+    (0, 1): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (1, 0): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (1, 2): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (2, 1): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (2, 3): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (3, 2): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (3, 0): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (0, 3): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+}
+I_KICKS = {
+    (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)),
+    (1, 0): ((0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)),
+    (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)),
+    (2, 1): ((0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)),
+    (2, 3): ((0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)),
+    (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)),
+    (3, 0): ((0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)),
+    (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)),
+}
+NO_KICKS = {key: ((0, 0),) for key in JLSTZ_KICKS}
+
+
+def piece_state(cells):
+    xs = [x for x, _ in cells]
+    ys = [y for _, y in cells]
+    left, top = min(xs), min(ys)
+    height = max(ys) - top + 1
+    masks = [0] * height
+    for x, y in cells:
+        masks[y - top] |= 1 << (x - left)
+    return PieceState(tuple(cells), tuple(masks), left, top, max(xs) - left + 1, height)
+
+
+def rotation_states(shape):
+    # The four clockwise rotations of shape about the center of its box
+    size = len(shape)
+    cells = [(x, y) for y, row in enumerate(shape) for x, val in enumerate(row) if val]
+    states = []
+    for _ in range(4):
+        states.append(piece_state(cells))
+        cells = [(size - 1 - y, x) for x, y in cells]
+    return states
+
+
+ROTATIONS = [rotation_states(shape) for shape in SHAPES]
+KICKS = [I_KICKS if len(shape) == 4 else NO_KICKS if len(shape) == 2 else JLSTZ_KICKS for shape in SHAPES]
+
+
+def collides(rows, state, x, y, width=WIDTH):
+    # True if state with its box at (x, y) leaves the board or overlaps a filled cell.
+    # rows holds one int per board row with bit x set where column x is filled.
+    x += state.left
+    y += state.top
+    if x < 0 or x + state.width > width or y < 0 or y + state.height > len(rows):
+        return True
+    for mask in state.masks:
+        if rows[y] & (mask << x):
+            return True
+        y += 1
+    return False
+
+
+def spawn_x(shape, width=WIDTH):
+    return width // 2 - len(SHAPES[shape][0]) // 2
+
+
+class TetrisGame:
+    # Board: one int per row for occupancy plus a color plane with one byte per cell, 0 for
+    # empty or 1 + the color index of the piece that filled it
+    def __init__(self, width=WIDTH, height=HEIGHT, seed=None):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rng = random.Random(seed)
+        self.rows = [0] * height
+        self.colors = bytearray(width * height)
+        self.current_shape = self.get_new_shape()  # index into SHAPES
+        self.next_shape = self.get_new_shape()
+        self.current_color = self.rng.randrange(NUM_COLORS)
+        self.next_color = self.rng.randrange(NUM_COLORS)
+        self.rotation = 0
+        self.shape_x = spawn_x(self.current_shape, width)
+        self.shape_y = 0
+        self.fall_time = 0
+        self.score = 0
+        self.lines = 0
+        self.pieces = 0
+        self.game_over = False
+
+    def get_new_shape(self):
+        return self.rng.randrange(len(SHAPES))
+
+    def state(self):
+        return ROTATIONS[self.current_shape][self.rotation]
+
+    def valid_space(self):
+        return not collides(self.rows, self.state(), self.shape_x, self.shape_y, self.width)
+
+    def move_shape(self, dx):
+        self.shape_x += dx
+        if not self.valid_space():
+            self.shape_x -= dx
+            return False
+        return True
+
+    def rotate_shape(self, turn=1):
+        # Clockwise for turn 1, counterclockwise for -1: the first wall kick that fits wins
+        rotation = (self.rotation + turn) % 4
+        state = ROTATIONS[self.current_shape][rotation]
+        for dx, dy in KICKS[self.current_shape][(self.rotation, rotation)]:
+            if not collides(self.rows, state, self.shape_x + dx, self.shape_y + dy, self.width):
+                self.rotation = rotation
+                self.shape_x += dx
+                self.shape_y += dy
+                return True
+        return False
+
+    def drop_shape(self):
+        # One row down; locks the piece and returns the rows cleared when it cannot fall
+        self.shape_y += 1
+        if self.valid_space():
+            return 0
+        self.shape_y -= 1
+        self.lock_shape()
+        return self.clear_rows()
+
+    def hard_drop(self):
+        state = self.state()
+        while not collides(self.rows, state, self.shape_x, self.shape_y + 1, self.width):
+            self.shape_y += 1
+        self.lock_shape()
+        return self.clear_rows()
+
+    def place(self, rotation, x):
+        # Hard drop the current piece from the top row at rotation and column x, as a placement
+        # search plays; returns the rows cleared, or None if the piece does not fit there
+        if self.game_over or collides(self.rows, ROTATIONS[self.current_shape][rotation], x, 0, self.width):
+            return None
+        self.rotation = rotation
+        self.shape_x = x
+        self.shape_y = 0
+        return self.hard_drop()
+
+    def lock_shape(self):
+        state = self.state()
+        color = self.current_color + 1
+        x = self.shape_x + state.left
+        for y, mask in enumerate(state.masks, self.shape_y + state.top):
+            self.rows[y] |= mask << x
+        for x, y in state.cells:
+            self.colors[(self.shape_y + y) * self.width + self.shape_x + x] = color
+        self.pieces += 1
+        self.current_shape = self.next_shape
+        self.current_color = self.next_color
+        self.next_shape = self.get_new_shape()
+        self.next_color = self.rng.randrange(NUM_COLORS)
+        self.rotation = 0
+        self.shape_x = spawn_x(self.current_shape, self.width)
+        self.shape_y = 0
+        self.fall_time = 0
+        if not self.valid_space():
+            self.game_over = True
+
+    def clear_rows(self):
+        kept = [y for y, row in enumerate(self.rows) if row != self.full_row]
+        cleared_rows = self.height - len(kept)
+        if cleared_rows:
+            width = self.width
+            self.rows = [0] * cleared_rows + [self.rows[y] for y in kept]
+            self.colors = bytearray(width * cleared_rows) + b''.join(
+                self.colors[y * width:(y + 1) * width] for y in kept)
+            self.score += cleared_rows * LINE_SCORE
+            self.lines += cleared_rows
+        return cleared_rows
+
+    def act(self, action):
+        # Apply one action without advancing time; returns the rows it cleared
+        if self.game_over:
+            return 0
+        if action == LEFT:
+            self.move_shape(-1)
+        elif action == RIGHT:
+            self.move_shape(1)
+        elif action == ROTATE:
+            self.rotate_shape(1)
+        elif action == ROTATE_CCW:
+            self.rotate_shape(-1)
+        elif action == SOFT_DROP:
+            return self.drop_shape()
+        elif action == HARD_DROP:
+            return self.hard_drop()
+        return 0
+
+    def step(self, action=NOOP):
+        # One frame: the action, then gravity every FALL_FRAMES frames.
+        # Returns (rows cleared this frame, game over).
+        if self.game_over:
+            return 0, True
+        cleared = self.act(action)
+        if not self.game_over and action != HARD_DROP:
+            self.fall_time += 1
+            if self.fall_time >= FALL_FRAMES:
+                self.fall_time = 0
+                cleared += self.drop_shape()
+        return cleared, self.game_over
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless Tetris with random actions')
+    parser.add_argument('--pieces', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    game = TetrisGame(seed=args.seed)
+    games = 1
+    frames = 0
+    start = time.perf_counter()
+    pieces = 0
+    while pieces + game.pieces < args.pieces:
+        if game.step(rng.choice(ACTIONS))[1]:
+            pieces += game.pieces
+            game = TetrisGame(seed=rng.getrandbits(32))
+            games += 1
+        frames += 1
+    elapsed = time.perf_counter() - start
+    print(f'{args.pieces} pieces, {games} games, {frames} frames in {elapsed:.2f}s: '
+          f'{args.pieces / elapsed:.0f} pieces/s, {frames / elapsed:.0f} frames/s')
+
+
+if __name__ == "__main__":
+    main()